@@ -0,0 +1,98 @@
+"""
+Benchmark Solr response decoding: pysolr.Results vs the SolrResponse fast path.
+
+Builds a synthetic results-page response (docs, facets and highlighting)
+from data/solr/movies.json and times decoding plus the same docs/facets
+processing SolrClient.search() does.
+
+Usage:
+    python benchmarks/bench_decode.py [--rows 10] [--iterations 2000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'web'))
+
+import pysolr  # noqa: E402
+
+from solr_client import SolrQueries  # noqa: E402
+from solr_response import SolrResponse, loads, orjson  # noqa: E402
+
+
+def build_payload(rows: int) -> bytes:
+    """Build a Solr JSON body shaped like a highlighted, faceted results page."""
+    with open(os.path.join(ROOT, 'data', 'solr', 'movies.json'), 'r', encoding='utf-8') as f:
+        movies = json.load(f)
+
+    docs = movies[:rows]
+    genre_counts = {}
+    year_counts = {}
+    for movie in movies:
+        for genre in movie.get('genres') or []:
+            genre_counts[genre] = genre_counts.get(genre, 0) + 1
+        if movie.get('year'):
+            year_counts[str(movie['year'])] = year_counts.get(str(movie['year']), 0) + 1
+
+    def flat(counts):
+        pairs = sorted(counts.items(), key=lambda kv: -kv[1])[:20]
+        return [item for pair in pairs for item in pair]
+
+    response = {
+        'responseHeader': {'status': 0, 'QTime': 4},
+        'response': {'numFound': len(movies), 'start': 0, 'docs': docs},
+        'facet_counts': {'facet_queries': {}, 'facet_fields': {'genres': flat(genre_counts), 'year': flat(year_counts)}},
+        'highlighting': {
+            doc['id']: {'plot': ['<mark>' + (doc.get('plot') or '')[:200] + '</mark>']}
+            for doc in docs
+        },
+    }
+    return json.dumps(response).encode('utf-8')
+
+
+def pysolr_path(payload: bytes) -> dict:
+    """What pysolr.Solr.search did: bytes -> str -> stdlib json -> Results."""
+    results = pysolr.Results(json.JSONDecoder().decode(payload.decode('utf-8')))
+    return PARSER._parse_search(results)
+
+
+def fast_path(payload: bytes) -> dict:
+    """SolrClient fast path: bytes -> orjson (if installed) -> SolrResponse."""
+    return PARSER._parse_search(SolrResponse(loads(payload)))
+
+
+PARSER = SolrQueries()
+
+
+def bench(fn, payload: bytes, iterations: int) -> float:
+    """Return mean microseconds per call."""
+    fn(payload)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn(payload)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    payload = build_payload(args.rows)
+    assert pysolr_path(payload) == fast_path(payload)
+
+    baseline = bench(pysolr_path, payload, args.iterations)
+    fast = bench(fast_path, payload, args.iterations)
+
+    print(f"Payload: {len(payload)} bytes, {args.rows} docs, decoder: {'orjson' if orjson else 'json (orjson not installed)'}")
+    print(f"pysolr.Results + json: {baseline:8.1f} us/response")
+    print(f"SolrResponse fast path: {fast:8.1f} us/response ({baseline / fast:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
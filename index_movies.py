@@ -1,6 +1,10 @@
 import json
+import os
+import sys
 
-import pysolr
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "web"))
+
+from solr_writer import SolrWriter  # noqa: E402
 
 
 SOLR_URL = "http://localhost:8983/solr/movies"
@@ -8,7 +12,7 @@ SOLR_URL = "http://localhost:8983/solr/movies"
 
 def main() -> None:
     """Reindex data/solr/movies.json into the Solr 'movies' collection."""
-    solr = pysolr.Solr(SOLR_URL, always_commit=True, timeout=30)
+    writer = SolrWriter(SOLR_URL, batch_size=1000, flush_interval=None, read_timeout=30)
 
     # Load JSON file
     with open("data/solr/movies.json", "r", encoding="utf-8") as f:
@@ -18,15 +22,19 @@ def main() -> None:
 
     # Delete existing docs
     print("Deleting existing docs from 'movies' collection...")
-    solr.delete(q="*:*")
+    writer.delete(q="*:*")
 
     print("Indexing documents into Solr...")
     batch_size = 1000
     for i in range(0, len(movies), batch_size):
         batch = movies[i : i + batch_size]
-        solr.add(batch)
+        writer.add(batch)
         print(f"Indexed {i + len(batch)}/{len(movies)}")
 
+    # One durable hard commit for the whole reindex
+    writer.commit()
+    writer.close()
+
     print("Done reindexing movies.")
 
 
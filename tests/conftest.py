@@ -0,0 +1,58 @@
+import json
+import os
+import sys
+
+import pytest
+
+# The web app's modules import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'web'))
+
+
+class FakeSolr:
+    """
+    In-process stand-in for the Solr select and luke handlers.
+
+    Serves `count` documents (ids d000, d001, ...) in id order, with
+    start/rows and cursorMark paging and a 'genres' facet. Every request's
+    parameters are recorded in `requests`.
+    """
+
+    def __init__(self, count=200, version=1):
+        self.docs = [{'id': f'd{i:03d}', 'title': f'Movie {i}', 'genres': ['Drama' if i % 2 else 'Comedy']}
+                     for i in range(count)]
+        self.version = version
+        self.requests = []
+
+    def send(self, params, handler='select'):
+        if handler == 'admin/luke':
+            return json.dumps({'index': {'version': self.version}}).encode('utf-8')
+        self.requests.append(dict(params))
+        rows = int(params.get('rows', 10))
+        out = {'responseHeader': {'status': 0, 'QTime': 1}}
+        if 'cursorMark' in params:
+            offset = 0 if params['cursorMark'] == '*' else int(params['cursorMark'][1:])
+            page = self.docs[offset:offset + rows]
+            out['nextCursorMark'] = f'c{offset + len(page)}'
+        else:
+            offset = int(params.get('start', 0))
+            page = self.docs[offset:offset + rows]
+        out['response'] = {'numFound': len(self.docs), 'start': offset, 'docs': page}
+        if params.get('facet') == 'true':
+            drama = sum(1 for doc in self.docs if doc['genres'] == ['Drama'])
+            out['facet_counts'] = {'facet_fields': {'genres': ['Drama', drama, 'Comedy', len(self.docs) - drama]}}
+        return json.dumps(out).encode('utf-8')
+
+
+@pytest.fixture
+def fake_solr():
+    return FakeSolr()
+
+
+@pytest.fixture
+def client(fake_solr):
+    from solr_client import SolrClient
+
+    client = SolrClient(version_check_interval=0)
+    client._send = fake_solr.send
+    yield client
+    client.transport.close()
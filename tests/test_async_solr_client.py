@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from async_solr_client import AsyncSolrClient
+from solr_replicas import ReplicaSet
+from solr_resilience import SolrUnavailable
+
+
+def select_response(docs=()):
+    return {'responseHeader': {'status': 0, 'QTime': 1}, 'response': {'numFound': len(docs), 'start': 0, 'docs': list(docs)}}
+
+
+def mock_client(client, handler):
+    """Route the client's HTTP calls to handler(request) instead of the network."""
+    pool = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    client._client = lambda: pool
+    return pool
+
+
+def test_unavailable_reads_are_retried_and_then_fail_fast():
+    client = AsyncSolrClient(max_retries=1, cache_bytes=0, coalesce=False)
+    client.breaker.failure_threshold = 2
+    attempts = []
+
+    async def down(params, handler='select'):
+        attempts.append(handler)
+        raise SolrUnavailable('connection refused')
+
+    client._send = down
+
+    async def run():
+        with pytest.raises(SolrUnavailable):
+            await client._request({'q': '*:*'})
+        assert len(attempts) == 2
+        with pytest.raises(SolrUnavailable):
+            await client._request({'q': '*:*'})
+
+    asyncio.run(run())
+    assert len(attempts) == 2
+    assert client.breaker.state == 'open'
+
+
+def test_identical_concurrent_searches_share_one_request():
+    client = AsyncSolrClient(cache_bytes=0)
+    sent = []
+
+    async def send(params, handler='select'):
+        sent.append(params)
+        await asyncio.sleep(0.01)
+        return json.dumps(select_response([{'id': 'd1'}])).encode('utf-8')
+
+    client._send = send
+
+    async def run():
+        return await asyncio.gather(client.search('alien'), client.search('alien'), client.search('heat'))
+
+    first, second, other = asyncio.run(run())
+    assert len(sent) == 2
+    assert first['docs'] == second['docs'] == other['docs'] == [{'id': 'd1'}]
+    assert client.flights.stats()['saved'] == 1
+
+
+def test_failing_replica_is_ejected():
+    replicas = ReplicaSet(['http://a/solr', 'http://b/solr'], eject_after=1, health_check_interval=0)
+    client = AsyncSolrClient(cache_bytes=0, coalesce=False, replicas=replicas, max_retries=1)
+    hosts = []
+
+    def handler(request):
+        hosts.append(request.url.host)
+        if request.url.host == 'a':
+            return httpx.Response(503, text='down')
+        return httpx.Response(200, json=select_response())
+
+    async def run():
+        mock_client(client, handler)
+        for _ in range(6):
+            result = await client.search('alien')
+            assert 'error' not in result
+
+    asyncio.run(run())
+    assert replicas.replicas[0].ejected
+    assert not replicas.replicas[1].ejected
+    assert hosts[-3:] == ['b', 'b', 'b']
+
+
+def test_cancelled_request_releases_its_replica():
+    replicas = ReplicaSet(['http://a/solr'], health_check_interval=0)
+    client = AsyncSolrClient(cache_bytes=0, replicas=replicas)
+
+    async def slow(request):
+        await asyncio.sleep(1)
+        return httpx.Response(200, json=select_response())
+
+    async def run():
+        mock_client(client, slow)
+        return await client.batch_search([{'query': 'alien'}], deadline=0.05)
+
+    results = asyncio.run(run())
+    assert results[0]['error'] == 'Batch deadline exceeded'
+    assert replicas.replicas[0].outstanding == 0
+    assert replicas.replicas[0].failures == 0
@@ -0,0 +1,60 @@
+from autocomplete_cache import PrefixCache
+
+
+TITLES = [
+    {'id': '1', 'title': 'Inception'},
+    {'id': '2', 'title': 'Inside Out'},
+    {'id': '3', 'title': 'The Incredibles'},
+]
+
+
+def fetcher(titles):
+    calls = []
+
+    def fetch(prefix, rows):
+        calls.append(prefix)
+        key = prefix.lower()
+        return [doc for doc in titles if any(w.lower().startswith(key) for w in doc['title'].split())][:rows]
+    return fetch, calls
+
+
+def test_longer_prefix_is_answered_from_a_complete_list():
+    fetch, calls = fetcher(TITLES)
+    cache = PrefixCache(candidates=10)
+    assert [d['id'] for d in cache.get('in', fetch)] == ['1', '2', '3']
+    assert [d['id'] for d in cache.get('inc', fetch)] == ['1', '3']
+    assert calls == ['in']
+    assert cache.extensions == 1
+
+
+def test_truncated_list_is_only_reused_for_the_same_prefix():
+    fetch, calls = fetcher(TITLES)
+    cache = PrefixCache(candidates=2)
+    cache.get('in', fetch)
+    cache.get('in', fetch)
+    cache.get('inc', fetch)
+    assert calls == ['in', 'inc']
+    assert cache.hits == 1
+
+
+def test_failed_fetch_is_not_cached():
+    cache = PrefixCache()
+    assert cache.get('in', lambda prefix, rows: None) == []
+    assert cache.stats()['entries'] == 0
+
+
+def test_version_change_clears_the_cache():
+    fetch, calls = fetcher(TITLES)
+    cache = PrefixCache()
+    cache.get('in', fetch, version=1)
+    cache.get('in', fetch, version=2)
+    assert calls == ['in', 'in']
+
+
+def test_least_recently_used_prefix_is_evicted():
+    fetch, _ = fetcher(TITLES)
+    cache = PrefixCache(max_entries=1, candidates=1)
+    cache.get('inc', fetch)
+    cache.get('the', fetch)
+    assert cache.stats()['entries'] == 1
+    assert cache.evictions == 1
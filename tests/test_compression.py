@@ -0,0 +1,36 @@
+import gzip
+
+from flask import Flask, Response
+
+from compression import Compressor
+
+
+def stream_app(**options):
+    app = Flask(__name__)
+    compressor = Compressor(app, **options)
+
+    @app.route('/rows')
+    def rows():
+        return Response((f'row {i},some value\n' for i in range(5000)), mimetype='text/csv')
+
+    return app, compressor
+
+
+def test_stream_is_flushed_in_blocks_not_per_chunk():
+    app, compressor = stream_app(flush_bytes=32 * 1024, flush_interval=60)
+    response = app.test_client().get('/rows', headers={'Accept-Encoding': 'gzip'})
+    parts = [part for part in response.response if part]
+    body = b''.join(parts)
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(body).count(b'\n') == 5000
+    # ~100 KB of rows: a handful of flushes, not one per row
+    assert len(parts) < 10
+    assert compressor.stats()['gzip']['streamed'] == 1
+
+
+def test_small_flush_size_still_produces_a_valid_stream():
+    app, _ = stream_app(flush_bytes=1, flush_interval=60)
+    response = app.test_client().get('/rows', headers={'Accept-Encoding': 'gzip'})
+
+    assert gzip.decompress(response.get_data()).count(b'\n') == 5000
@@ -0,0 +1,67 @@
+import pytest
+from flask import Flask
+
+from conditional import ConditionalGet
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    state = {'version': 1, 'calls': 0}
+    conditional = ConditionalGet(app, version=lambda: state['version'], routes=['/page/<name>'])
+
+    @app.route('/page/<name>')
+    def page(name):
+        state['calls'] += 1
+        if name == 'partial':
+            conditional.skip()
+        return f'page {name}'
+
+    @app.route('/other')
+    def other():
+        return 'other'
+
+    app.state = state
+    app.conditional = conditional
+    return app
+
+
+def test_matching_etag_is_answered_before_the_view(app):
+    client = app.test_client()
+    first = client.get('/page/a?x=1')
+    etag = first.headers['ETag']
+
+    again = client.get('/page/a?x=1', headers={'If-None-Match': etag})
+
+    assert first.status_code == 200
+    assert 'max-age' in first.headers['Cache-Control']
+    assert again.status_code == 304
+    assert app.state['calls'] == 1
+    assert app.conditional.not_modified == 1
+
+
+def test_etag_changes_with_index_version_and_arguments(app):
+    client = app.test_client()
+    etag = client.get('/page/a?x=1').headers['ETag']
+
+    assert client.get('/page/a?x=2').headers['ETag'] != etag
+    app.state['version'] = 2
+    assert client.get('/page/a?x=1', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_skipped_and_unversioned_responses_are_not_stored(app):
+    client = app.test_client()
+    skipped = client.get('/page/partial')
+    assert 'ETag' not in skipped.headers
+    assert skipped.headers['Cache-Control'] == 'no-store'
+
+    app.state['version'] = None
+    unknown = client.get('/page/a')
+    assert 'ETag' not in unknown.headers
+    assert unknown.headers['Cache-Control'] == 'no-store'
+
+
+def test_other_routes_are_left_alone(app):
+    response = app.test_client().get('/other')
+    assert 'ETag' not in response.headers
+    assert 'Cache-Control' not in response.headers
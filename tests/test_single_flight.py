@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_identical_calls_run_once():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'result'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do('k', slow)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do('k', slow))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    # Followers register before the leader finishes
+    while flight.stats()['executed'] + flight.saved < 4:
+        pass
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert results == ['result'] * 4
+    assert len(calls) == 1
+    assert flight.stats() == {'executed': 1, 'saved': 3, 'in_flight': 0}
+
+
+def test_error_is_shared_and_key_released():
+    flight = SingleFlight()
+
+    def fail():
+        raise RuntimeError('down')
+
+    with pytest.raises(RuntimeError):
+        flight.do('k', fail)
+    assert flight.do('k', lambda: 'again') == 'again'
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_different_keys_are_not_coalesced():
+    flight = SingleFlight()
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.do('b', lambda: 2) == 2
+    assert flight.executed == 2
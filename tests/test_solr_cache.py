@@ -0,0 +1,48 @@
+from solr_cache import ResultCache, make_key
+
+
+def test_make_key_ignores_parameter_order_and_whitespace():
+    first = make_key('select', {'q': 'dark  knight', 'fq': ['b', 'a'], 'rows': 10})
+    second = make_key('select', {'rows': 10, 'fq': ['a', 'b'], 'q': 'dark knight'})
+    assert first == second
+
+
+def test_make_key_keeps_query_case():
+    assert make_key('select', {'q': 'Drama'}) != make_key('select', {'q': 'drama'})
+
+
+def test_get_returns_stored_payload():
+    cache = ResultCache()
+    cache.set('k', b'payload')
+    assert cache.get('k') == b'payload'
+    assert cache.get('missing') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_is_evicted_to_fit():
+    cache = ResultCache(max_bytes=25)
+    cache.set('a', b'x' * 10)
+    cache.set('b', b'x' * 10)
+    cache.get('a')
+    cache.set('c', b'x' * 10)
+    assert cache.get('a') is not None
+    assert cache.get('b') is None
+    assert cache.evictions == 1
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('solr_cache.time.monotonic', lambda: now[0])
+    cache = ResultCache(ttl=10)
+    cache.set('k', b'v')
+    now[0] += 11
+    assert cache.get('k') is None
+    assert cache.expirations == 1
+
+
+def test_version_change_clears_the_cache():
+    cache = ResultCache()
+    cache.set('k', b'v', version=1)
+    assert cache.get('k', version=1) == b'v'
+    assert cache.get('k', version=2) is None
+    assert cache.invalidations == 1
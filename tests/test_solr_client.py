@@ -0,0 +1,58 @@
+def test_facet_counts_are_reused_across_windows(client, fake_solr):
+    first = client.search('movie', facets=['genres'], start=0, rows=50)
+    second = client.search('movie', facets=['genres'], start=0, rows=100, cursor_mark='*')
+
+    # The first request carries timeAllowed, the cursor one can't
+    assert 'timeAllowed' in fake_solr.requests[0]
+    assert 'cursorMark' in fake_solr.requests[1]
+    assert fake_solr.requests[0]['facet'] == 'true'
+    assert fake_solr.requests[1]['facet'] == 'false'
+    assert second['facets'] == first['facets']
+
+
+def test_pages_of_a_window_are_served_from_one_request(client, fake_solr):
+    first = client.search_page('movie', start=0, rows=10)
+    second = client.search_page('movie', start=10, rows=10)
+
+    assert len(fake_solr.requests) == 1
+    assert int(fake_solr.requests[0]['rows']) == 50
+    assert [doc['id'] for doc in first['docs']] == [f'd{i:03d}' for i in range(10)]
+    assert [doc['id'] for doc in second['docs']] == [f'd{i:03d}' for i in range(10, 20)]
+    assert 'next_cursor_mark' not in second
+
+
+def test_next_window_cursor_comes_from_the_cached_window(client, fake_solr):
+    second = client.search_page('movie', start=50, rows=10)
+    third = client.search_page('movie', start=100, rows=10)
+
+    # The second window starts the chain, the third continues it from the
+    # cursor stored with the second
+    assert fake_solr.requests[0]['cursorMark'] == '*'
+    assert fake_solr.requests[1]['cursorMark'] == 'c100'
+    assert second['docs'][0]['id'] == 'd050'
+    assert third['docs'][0]['id'] == 'd100'
+
+
+def test_window_without_cached_predecessor_is_fetched_by_offset(client, fake_solr):
+    page = client.search_page('movie', start=150, rows=10)
+
+    assert 'cursorMark' not in fake_solr.requests[0]
+    assert int(fake_solr.requests[0]['start']) == 150
+    assert page['docs'][0]['id'] == 'd150'
+
+
+def test_caller_cursor_is_not_cached(client, fake_solr):
+    forged = client.search_page('movie', start=50, rows=10, cursor_mark='c150')
+    honest = client.search_page('movie', start=50, rows=10)
+
+    assert forged['docs'][0]['id'] == 'd150'
+    assert honest['docs'][0]['id'] == 'd050'
+    assert len(fake_solr.requests) == 2
+
+
+def test_capped_window_is_flagged_and_not_cached(client, fake_solr):
+    client.guard.max_start = 100
+    page = client.search_page('movie', start=150, rows=10)
+
+    assert page['capped']
+    assert client.window_cache.stats()['entries'] == 0
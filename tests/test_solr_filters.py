@@ -0,0 +1,37 @@
+from solr_filters import build_filter_queries, facet_fields
+
+
+def test_clauses_are_canonical():
+    first = build_filter_queries({'genres': ['Drama', 'Action', 'Drama'], 'year': (2000, 2010)})
+    second = build_filter_queries({'year': (2000, 2010), 'genres': ['Action', 'Drama']})
+    assert first == second == [
+        '{!tag=genres}(genres:"Action" OR genres:"Drama")',
+        '{!tag=year}year:[2000 TO 2010]',
+    ]
+
+
+def test_range_bounds_are_snapped_inwards():
+    assert build_filter_queries({'rating': (6.95, None), 'year': (1999.5, None)}, tag=False) == [
+        'rating:[7.0 TO *]',
+        'year:[2000 TO *]',
+    ]
+    assert build_filter_queries({'rating': (None, 7.05)}, tag=False) == ['rating:[* TO 7.0]']
+
+
+def test_bounds_at_the_limits_are_open():
+    assert build_filter_queries({'rating': (7, 10)}, tag=False) == ['rating:[7.0 TO *]']
+    assert build_filter_queries({'rating': (0, 10)}, tag=False) == ['rating:[* TO *]']
+
+
+def test_values_are_quoted():
+    assert build_filter_queries({'cast': 'Tom "T" Hanks'}, tag=False) == ['cast:"Tom \\"T\\" Hanks"']
+
+
+def test_empty_values_are_skipped():
+    # A range without bounds is no filter; one opened at the limits is
+    assert build_filter_queries({'genres': [], 'site': '', 'year': (None, None)}) == []
+
+
+def test_facet_fields_exclude_their_own_filter():
+    assert facet_fields(['genres', 'year'], {'genres': ['Drama']}) == ['{!ex=genres}genres', 'year']
+    assert facet_fields(['genres'], {'genres': ['Drama']}, multi_select=False) == ['genres']
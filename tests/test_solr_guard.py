@@ -0,0 +1,67 @@
+from solr_guard import QueryGuard, escape, prefix_query
+
+
+def test_plain_terms_are_kept():
+    assert QueryGuard().rewrite_query('dark knight') == ('dark knight', 2, False)
+
+
+def test_leading_wildcard_is_stripped():
+    query, _, simplified = QueryGuard().rewrite_query('*ight')
+    assert query == 'ight'
+    assert not simplified
+
+
+def test_short_prefix_is_not_expanded():
+    guard = QueryGuard(min_prefix=3)
+    assert guard.rewrite_query('ab*')[0] == 'ab'
+    assert guard.rewrite_query('abc*')[0] == 'abc*'
+
+
+def test_local_params_and_regexes_are_escaped():
+    guard = QueryGuard()
+    assert guard.rewrite_query('{!join')[0] == escape('{!join')
+    assert guard.rewrite_query('/ab.*/')[0] == escape('/ab.*/')
+
+
+def test_fuzzy_and_slop_are_clamped():
+    guard = QueryGuard(max_slop=10)
+    assert guard.rewrite_query('batmn~2')[0] == 'batmn~1'
+    assert guard.rewrite_query('"dark knight"~50')[0] == '"dark knight"~10'
+
+
+def test_costly_query_is_reduced_to_literal_terms():
+    query, cost, simplified = QueryGuard(max_cost=100).rewrite_query('a*b?c a*b?c a*b?c')
+    assert simplified
+    assert query == ' '.join([escape('a*b?c')] * 3)
+    assert cost == 3
+
+
+def test_admit_caps_paging_and_sets_time_allowed():
+    params = {'q': 'x', 'rows': 500, 'start': 9000}
+    admitted = QueryGuard(max_rows=100, max_start=5000, time_allowed=2000).admit(params)
+    assert admitted == {'q': 'x', 'rows': 100, 'start': 5000, 'timeAllowed': 2000}
+    assert params['rows'] == 500
+
+
+def test_admit_leaves_time_allowed_off_cursor_requests():
+    admitted = QueryGuard().admit({'q': 'x', 'rows': 10, 'cursorMark': '*'})
+    assert 'timeAllowed' not in admitted
+
+
+def test_prefix_query_only_expands_the_last_word():
+    assert prefix_query('title', 'the dar') == '+title:the +title:dar*'
+    assert prefix_query('title', 'd') == '+title:d'
+    assert prefix_query('title', '  ') == ''
+
+
+def test_prefix_query_survives_admission_unchanged():
+    guard = QueryGuard()
+    for prefix in ('spider-m', 'ac/dc', 'x-men'):
+        query = prefix_query('title', prefix)
+        assert guard.admit({'q': query})['q'] == query
+    assert prefix_query('title', 'spider-m') == '+title:spider\\-m*'
+
+
+def test_escaped_wildcard_is_literal():
+    assert QueryGuard().rewrite_query('foo\\*')[0] == 'foo\\*'
+    assert QueryGuard().rewrite_query('*foo\\-b*')[0] == 'foo\\-b*'
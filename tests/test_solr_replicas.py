@@ -0,0 +1,66 @@
+import pytest
+
+from solr_replicas import ReplicaSet
+
+
+def test_least_outstanding_spreads_reads():
+    replicas = ReplicaSet(['http://a/solr', 'http://b/solr'])
+    first = replicas.acquire()
+    second = replicas.acquire()
+
+    assert {first.url, second.url} == {'http://a/solr', 'http://b/solr'}
+
+
+def test_replica_is_ejected_after_repeated_failures():
+    replicas = ReplicaSet(['http://a/solr', 'http://b/solr'], eject_after=3)
+    bad = replicas.replicas[0]
+    for _ in range(3):
+        replicas.acquire()
+        replicas.release(bad, failed=True)
+
+    assert bad.ejected
+    assert bad.times_ejected == 1
+    assert all(replicas.acquire().url == 'http://b/solr' for _ in range(5))
+    assert replicas.preferred().url == 'http://b/solr'
+    assert replicas.stats()['in_rotation'] == 1
+
+
+def test_health_check_readmits_answering_replica():
+    replicas = ReplicaSet(['http://a/solr', 'http://b/solr'], eject_after=1)
+    bad = replicas.replicas[0]
+    replicas.record_failure(bad)
+
+    replicas.check(lambda url: False)
+    assert bad.ejected
+
+    replicas.check(lambda url: url == 'http://a/solr')
+    assert not bad.ejected
+    assert bad.failures == 0
+    assert replicas.stats()['in_rotation'] == 2
+
+
+def test_failing_ping_counts_as_unhealthy():
+    replicas = ReplicaSet(['http://a/solr'], eject_after=1)
+    replicas.record_failure(replicas.replicas[0])
+
+    def ping(url):
+        raise OSError('connection refused')
+
+    replicas.check(ping)
+    assert replicas.replicas[0].ejected
+
+
+def test_all_ejected_falls_back_to_longest_ejected():
+    replicas = ReplicaSet(['http://a/solr', 'http://b/solr'], eject_after=1)
+    first, second = replicas.replicas
+    replicas.record_failure(first)
+    replicas.record_failure(second)
+
+    assert replicas.acquire() is first
+
+
+def test_invalid_configuration_is_rejected():
+    with pytest.raises(ValueError):
+        ReplicaSet([])
+    with pytest.raises(ValueError):
+        ReplicaSet(['http://a/solr'], strategy='random')
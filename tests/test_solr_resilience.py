@@ -0,0 +1,114 @@
+import pysolr
+import pytest
+
+from solr_client import SolrClient
+from solr_resilience import CircuitBreaker, LatencyTracker, RetryBudget, SolrUnavailable
+
+
+def fake_clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('solr_resilience.time.monotonic', lambda: now[0])
+    return now
+
+
+def test_breaker_opens_after_consecutive_failures(monkeypatch):
+    fake_clock(monkeypatch)
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.stats()['rejected'] == 1
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_one_trial_through(monkeypatch):
+    now = fake_clock(monkeypatch)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    now[0] += 31
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens(monkeypatch):
+    now = fake_clock(monkeypatch)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    now[0] += 31
+    breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.times_opened == 2
+
+
+def test_retry_budget_limits_retries_to_a_share_of_requests():
+    budget = RetryBudget(ratio=0.5, min_tokens=2)
+    assert budget.withdraw()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
+    assert budget.stats() == {'tokens': 0.0, 'retries': 3, 'denied': 1}
+
+
+def test_retry_budget_caps_saved_tokens():
+    budget = RetryBudget(ratio=1, min_tokens=2)
+    for _ in range(10):
+        budget.deposit()
+    assert budget.tokens == 2
+
+
+def test_latency_percentile_needs_enough_samples():
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for i in range(9):
+        tracker.record(i / 100)
+    assert tracker.percentile(95) is None
+    tracker.record(1.0)
+    assert tracker.percentile(95) == 1.0
+    assert tracker.percentile(50) == 0.05
+
+
+def test_client_retries_unavailable_reads_and_then_fails_fast():
+    client = SolrClient(max_retries=1, failure_threshold=2, cache_bytes=0, coalesce=False)
+    attempts = []
+
+    def down(params, handler='select'):
+        attempts.append(handler)
+        raise SolrUnavailable('connection refused')
+
+    client._send = down
+    with pytest.raises(SolrUnavailable):
+        client._request({'q': '*:*'})
+    assert len(attempts) == 2
+    assert client.breaker.state == 'open'
+
+    with pytest.raises(SolrUnavailable):
+        client._request({'q': '*:*'})
+    assert len(attempts) == 2
+
+    # A rejected request (4xx) is an answer: it doesn't count as a failure
+    def rejected(params, handler='select'):
+        raise pysolr.SolrError('bad request')
+
+    client.breaker.record_success()
+    client._send = rejected
+    with pytest.raises(pysolr.SolrError):
+        client._request({'q': '*:*'})
+    assert client.breaker.state == 'closed'
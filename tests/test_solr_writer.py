@@ -0,0 +1,74 @@
+import pysolr
+import pytest
+
+from solr_writer import SolrWriter
+
+
+class FakeSolr:
+    """Records requests; deletes of the query 'fail' raise once."""
+
+    def __init__(self):
+        self.requests = []
+        self.commits = 0
+        self.fail_once = {'fail'}
+
+    def add(self, docs, **kwargs):
+        self.requests.append(('add', [doc['id'] for doc in docs]))
+
+    def delete(self, id=None, q=None, **kwargs):
+        if q in self.fail_once:
+            self.fail_once.discard(q)
+            raise pysolr.SolrError('rejected')
+        self.requests.append(('delete', id if q is None else q))
+
+    def commit(self, **kwargs):
+        self.commits += 1
+
+
+@pytest.fixture
+def writer():
+    writer = SolrWriter(flush_interval=None, batch_size=100)
+    writer.solr = FakeSolr()
+    yield writer
+    writer.transport.close()
+
+
+def test_flush_groups_consecutive_operations(writer):
+    writer.add([{'id': '1'}, {'id': '2'}])
+    writer.delete(id=['3', '4'])
+    writer.add([{'id': '5'}])
+    assert writer.flush() == 5
+    assert writer.solr.requests == [('add', ['1', '2']), ('delete', ['3', '4']), ('add', ['5'])]
+    assert writer.pending() == 0
+
+
+def test_batch_size_triggers_a_flush(writer):
+    writer.batch_size = 2
+    writer.add([{'id': '1'}])
+    assert writer.solr.requests == []
+    writer.add([{'id': '2'}])
+    assert writer.solr.requests == [('add', ['1', '2'])]
+
+
+def test_failed_flush_keeps_unsent_operations_in_order(writer):
+    writer.add([{'id': '1'}])
+    writer.delete(q='ok')
+    writer.delete(q='fail')
+    writer.delete(id='2')
+    with pytest.raises(pysolr.SolrError):
+        writer.flush()
+    assert writer.solr.requests == [('add', ['1']), ('delete', 'ok')]
+    assert writer.pending() == 2
+    assert writer.stats['errors'] == 1
+
+    # Buffered meanwhile: goes after the requeued operations
+    writer.add([{'id': '3'}])
+    assert writer.flush() == 3
+    assert writer.solr.requests[2:] == [('delete', 'fail'), ('delete', ['2']), ('add', ['3'])]
+
+
+def test_delete_needs_exactly_one_selector(writer):
+    with pytest.raises(ValueError):
+        writer.delete()
+    with pytest.raises(ValueError):
+        writer.delete(id='1', q='*:*')
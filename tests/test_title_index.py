@@ -0,0 +1,72 @@
+import json
+
+from title_index import TitleIndex, normalize, popularity
+
+
+MOVIES = [
+    {'id': 'tt1', 'title': 'The Dark Knight', 'year': 2008, 'numVotes': 2500000, 'rating': 9.0},
+    {'id': 'tt2', 'title': 'Dark City', 'year': 1998, 'numVotes': 200000, 'rating': 7.6},
+    {'id': 'tt3', 'title': 'Amélie', 'year': 2001, 'numVotes': 700000, 'rating': 8.3},
+    {'id': 'tt4', 'title': 'Spider-Man', 'year': 2002, 'numVotes': 800000, 'rating': 7.4},
+    {'id': 'tt5', 'title': 'Darkman', 'year': 1990, 'numVotes': 60000, 'rating': 6.4},
+    {'id': 'tt6', 'title': '', 'year': 2000},
+]
+
+
+def build(movies=MOVIES):
+    index = TitleIndex('unused.json')
+    index.build(movies)
+    return index
+
+
+def test_normalize_folds_case_diacritics_and_punctuation():
+    assert normalize('Amélie') == normalize('AMELIE') == 'amelie'
+    assert normalize('Spider-Man') == normalize('spider  man') == 'spider man'
+
+
+def test_popularity_favours_votes_and_rating():
+    assert popularity({'numVotes': 1000, 'rating': 8.0}) > popularity({'numVotes': 1000, 'rating': 5.0})
+    assert popularity({'numVotes': 100000, 'rating': 6.0}) > popularity({'numVotes': 10, 'rating': 9.0})
+    assert popularity({}) == 0.0
+
+
+def test_index_is_not_ready_before_build():
+    index = TitleIndex('unused.json')
+    assert not index.ready
+    assert index.complete('dark') is None
+
+
+def test_prefix_matches_any_word_in_popularity_order():
+    index = build()
+    titles = [doc['title'] for doc in index.complete('dark')]
+
+    assert titles == ['The Dark Knight', 'Dark City', 'Darkman']
+    assert index.complete('knig')[0] == {'id': 'tt1', 'title': 'The Dark Knight', 'year': 2008}
+    assert [doc['id'] for doc in index.complete('dark', limit=1)] == ['tt1']
+
+
+def test_input_is_normalized_before_matching():
+    index = build()
+    assert [doc['id'] for doc in index.complete('ameli')] == ['tt3']
+    assert [doc['id'] for doc in index.complete('spider m')] == ['tt4']
+    assert index.complete('  -- ') == []
+    assert index.stats()['titles'] == 5
+
+
+def test_large_ranges_use_the_popularity_scan():
+    movies = [{'id': f'tt{i}', 'title': f'Star {i}', 'numVotes': i, 'rating': 5.0} for i in range(50)]
+    index = build(movies)
+    index.SCAN_THRESHOLD = 10
+
+    assert [doc['id'] for doc in index.complete('star', limit=3)] == ['tt49', 'tt48', 'tt47']
+
+
+def test_refresh_rebuilds_only_on_change(tmp_path):
+    path = tmp_path / 'movies.json'
+    path.write_text(json.dumps(MOVIES), encoding='utf-8')
+    index = TitleIndex(str(path))
+
+    assert index.refresh()
+    assert not index.refresh()
+    assert index.refresh(force=True)
+    assert index.builds == 2
@@ -2,8 +2,22 @@
 Flask web application.
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, Response, render_template, request, jsonify, redirect, stream_with_context, url_for
 from solr_client import SolrClient
+from async_solr_client import AsyncSolrClient
+from facet_snapshot import FacetSnapshot
+from solr_guard import prefix_query
+from http_metrics import RouteMetrics, render_solr_metrics
+from conditional import ConditionalGet, fingerprint_files
+from compression import Compressor
+from title_index import TitleIndex
+from autocomplete_cache import PrefixCache
+from fragment_cache import FragmentCache
+import pysolr
+import csv
+import io
+import itertools
+import json
 import os
 import random
 
@@ -11,18 +25,137 @@ import random
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'dev-key'
 
-# Initialize Solr client
-solr_client = SolrClient()
+# Per-route request counts, latencies and in-flight requests for /metrics
+route_metrics = RouteMetrics(app)
+
+# Initialize Solr client. SOLR_URLS lists the collection on each read
+# replica (comma separated); reads are balanced across them
+SOLR_URLS = [url.strip() for url in os.environ.get('SOLR_URLS', '').split(',') if url.strip()]
+solr_client = SolrClient(SOLR_URLS) if SOLR_URLS else SolrClient()
+
+# Under an ASGI server (see asgi.py) the Solr calls of the fan-out routes
+# run concurrently on the event loop before the view is called (see
+# ASYNC_LOADERS), so no worker thread waits on them. The async client
+# shares the sync client's caches, breaker, retry budget and replicas.
+# The Flask development server keeps making the same calls synchronously.
+async_solr_client = AsyncSolrClient(
+    cache=solr_client.cache,
+    facet_cache=solr_client.facet_cache,
+    guard=solr_client.guard,
+    metrics=solr_client.metrics,
+    replicas=solr_client.replicas,
+    breaker=solr_client.breaker,
+    retry_budget=solr_client.retry_budget,
+    max_retries=solr_client.max_retries
+)
+
+# WSGI environ key holding the result of a route's async loader
+PREFETCHED_KEY = 'movie_ir.prefetched'
+
+# Global facet counts, refreshed in the background when the index changes
+facet_snapshot = FacetSnapshot(solr_client)
+facet_snapshot.start()
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Title prefix index for autocomplete, built from the file index_movies.py
+# loads and rebuilt when it or the Solr index changes
+MOVIES_FILE = os.path.join(APP_DIR, '..', 'data', 'solr', 'movies.json')
+title_index = TitleIndex(MOVIES_FILE, solr_client)
+title_index.start()
+
+# Longer prefixes typed one keystroke at a time are answered by filtering
+# the cached candidates of a shorter one
+autocomplete_cache = PrefixCache()
+
+# Changes whenever the templates or view code change, so cached pages
+# are never served with stale markup after a deploy
+RENDER_VERSION = fingerprint_files(os.path.join(APP_DIR, 'templates'), os.path.abspath(__file__))
+
+# Pages that only change with the index answer If-None-Match with 304
+# without querying Solr. /api/stats and /metrics are live counters and
+# /api/batch is a POST, so they are left out.
+conditional_get = ConditionalGet(
+    app,
+    version=solr_client.index_version,
+    routes=['/search', '/movie/<movie_id>', '/similar/<doc_id>', '/api/autocomplete'],
+    render_version=RENDER_VERSION
+)
+
+# Rendered movie cards (templates/cards), reused across result and
+# similar pages until the index or the card templates change
+card_cache = FragmentCache(
+    max_bytes=8 * 1024 * 1024,
+    template_version=fingerprint_files(os.path.join(APP_DIR, 'templates', 'cards'))
+)
+
+# gzip/brotli for HTML, JSON and streamed exports (bodies over 1 KB)
+compressor = Compressor(app)
 
 # Results per page
 RESULTS_PER_PAGE = 10
 
+# Rows fetched per Solr request for /search; later pages of the window
+# are served from memory, and the next window is prefetched
+RESULT_WINDOW = 50
+PREFETCH_NEXT_WINDOW = True
+
+# Deepest page reachable: the query guard caps start at max_start, so
+# the last full window is the one starting at or below it
+MAX_PAGE = (solr_client.guard.max_start // RESULT_WINDOW + 1) * RESULT_WINDOW // RESULTS_PER_PAGE
+
+# Characters of plot/review shown per result
+SNIPPET_LENGTH = SolrClient.SNIPPET_LENGTH
+
+# Limits for /api/batch
+BATCH_MAX_QUERIES = 50
+BATCH_MAX_ROWS = 100
+BATCH_DEADLINE = 5.0
+
+# Fields that may be requested from /export
+EXPORT_FIELDS = ['id', 'title', 'year', 'rating', 'tomatometer', 'genres', 'directors', 'cast', 'url', 'site', 'poster']
+DEFAULT_EXPORT_FIELDS = ['id', 'title', 'year', 'rating', 'genres', 'directors']
+
+
+def parse_filters(args):
+    """
+    Build a SolrClient filter dict from request arguments.
+
+    Returns:
+        Tuple of (filters, selected_genres, year_min, year_max, rating_min)
+    """
+    filters = {}
+    
+    # Genre filter (can be multiple)
+    selected_genres = args.getlist('genres')
+    if selected_genres:
+        filters['genres'] = selected_genres
+    
+    # Year range filter
+    year_min = args.get('year_min', '').strip()
+    year_max = args.get('year_max', '').strip()
+    if year_min or year_max:
+        # A missing bound stays open rather than defaulting to a fixed year
+        min_val = int(year_min) if year_min else None
+        max_val = int(year_max) if year_max else None
+        filters['year'] = (min_val, max_val)
+    
+    # Rating filter
+    rating_min = args.get('rating_min', '').strip()
+    if rating_min:
+        filters['rating'] = (float(rating_min), None)
+
+    return filters, selected_genres, year_min, year_max, rating_min
+
 
 @app.route('/')
 def index():
     """Home page with search form."""
-    # Get available facet values for filters
-    genres = solr_client.get_facet_values('genres', limit=50)
+    # Get available facet values for filters from the snapshot, so the
+    # home page needs no Solr call once it is ready
+    genres = facet_snapshot.get('genres', limit=50)
+    if genres is None:
+        genres = solr_client.get_facet_values('genres', limit=50)
     
     return render_template(
         'index.html',
@@ -49,49 +182,42 @@ def search():
     if not query:
         query = '*:*'
     
-    page = int(request.args.get('page', 1))
+    page = min(max(1, int(request.args.get('page', 1))), MAX_PAGE)
     start = (page - 1) * RESULTS_PER_PAGE
     
     # Get filters
-    filters = {}
-    
-    # Genre filter (can be multiple)
-    selected_genres = request.args.getlist('genres')
-    if selected_genres:
-        filters['genres'] = selected_genres
-    
-    # Year range filter
-    year_min = request.args.get('year_min', '').strip()
-    year_max = request.args.get('year_max', '').strip()
-    if year_min or year_max:
-        min_val = int(year_min) if year_min else 1900
-        max_val = int(year_max) if year_max else 2024
-        filters['year'] = (min_val, max_val)
-    
-    # Rating filter
-    rating_min = request.args.get('rating_min', '').strip()
-    if rating_min:
-        filters['rating'] = (float(rating_min), 10.0)
+    filters, selected_genres, year_min, year_max, rating_min = parse_filters(request.args)
     
     # Sort order
     sort = request.args.get('sort', '')
     if not sort:
         sort = None  # Use Solr's default relevance ranking
     
+    # Unfiltered match-all pages show the global counts from the snapshot
+    facets = None
+    if query == '*:*' and not filters:
+        facets = facet_snapshot.facets(['genres', 'year'], limit=20)
+    
     # Perform search with faceting
-    results = solr_client.search(
+    results = solr_client.search_page(
         query=query,
         filters=filters,
-        facets=['genres', 'year'],
+        facets=None if facets else ['genres', 'year'],
         sort=sort,
         start=start,
         rows=RESULTS_PER_PAGE,
-        highlight=True
+        highlight=True,
+        profile='results',
+        window=RESULT_WINDOW,
+        prefetch=PREFETCH_NEXT_WINDOW
     )
     
     # Calculate pagination
     total_results = results['num_found']
-    total_pages = (total_results + RESULTS_PER_PAGE - 1) // RESULTS_PER_PAGE
+    if results.get('partial') or results.get('capped') or results.get('error'):
+        # Incomplete results must not be reused by a proxy or browser
+        conditional_get.skip()
+    total_pages = min((total_results + RESULTS_PER_PAGE - 1) // RESULTS_PER_PAGE, MAX_PAGE)
     
     # Process highlighting
     docs_with_highlights = []
@@ -124,15 +250,19 @@ def search():
         else:
             doc['poster'] = poster
         
-        # Truncate for display
+        # Truncate for display (Solr sends at most SNIPPET_LENGTH + 1
+        # characters of unhighlighted plot)
         if doc['highlighted_plot']:
-            doc['snippet'] = doc['highlighted_plot'][:300] + '...' if len(doc['highlighted_plot']) > 300 else doc['highlighted_plot']
+            doc['snippet'] = doc['highlighted_plot'][:SNIPPET_LENGTH] + '...' if len(doc['highlighted_plot']) > SNIPPET_LENGTH else doc['highlighted_plot']
         elif doc['highlighted_reviews']:
-            doc['snippet'] = doc['highlighted_reviews'][:300] + '...' if len(doc['highlighted_reviews']) > 300 else doc['highlighted_reviews']
+            doc['snippet'] = doc['highlighted_reviews'][:SNIPPET_LENGTH] + '...' if len(doc['highlighted_reviews']) > SNIPPET_LENGTH else doc['highlighted_reviews']
         else:
             doc['snippet'] = ''
         
         docs_with_highlights.append(doc)
+
+    # Snippets depend on the query, so they stay outside the cached card
+    render_cards(docs_with_highlights, 'cards/result.html')
     
     return render_template(
         'results.html',
@@ -142,33 +272,69 @@ def search():
         page=page,
         total_pages=total_pages,
         results_per_page=RESULTS_PER_PAGE,
-        facets=results.get('facets', {}),
+        facets=facets or results.get('facets', {}),
         selected_genres=selected_genres,
         year_min=year_min,
         year_max=year_max,
         rating_min=rating_min,
-        sort=sort
+        sort=sort,
+        partial=results.get('partial', False)
     )
 
 
 @app.route('/movie/<movie_id>')
 def movie_detail(movie_id):
     """Movie detail page."""
-    movie = solr_client.get_by_id(movie_id)
-    
+    # Document and similar movies are fetched in parallel
+    return render_movie(prefetched(lambda: solr_client.get_movie(movie_id, rows=5)), movie_id)
+
+
+async def load_movie_detail(movie_id):
+    """Solr data of the movie detail page, fetched on the event loop."""
+    return await async_solr_client.get_movie(movie_id, rows=5)
+
+
+def prefetched(load):
+    """
+    Result of the route's async loader if it already ran (see asgi.py), else load().
+
+    Args:
+        load: Makes the same Solr calls synchronously
+    """
+    if PREFETCHED_KEY in request.environ:
+        return request.environ[PREFETCHED_KEY]
+    return load()
+
+
+def render_movie(movie, movie_id):
+    """Render the detail page for a get_movie() result."""
     if not movie:
         return render_template('error.html', message=f"Movie with ID '{movie_id}' not found."), 404
     
-    # Get similar movies
-    similar = solr_client.more_like_this(movie_id, rows=5)
-    
+    render_cards(movie['similar'], 'cards/strip.html')
     return render_template(
         'movie.html',
-        movie=movie,
-        similar_movies=similar.get('docs', [])
+        movie=movie['doc'],
+        similar_movies=movie['similar']
     )
 
 
+def render_cards(docs, template):
+    """
+    Set doc['card_html'] to each doc's rendered card, from the card cache when possible.
+
+    Args:
+        docs: Solr documents, already prepared for display
+        template: Card template under templates/cards
+    """
+    version = solr_client.index_version()
+    for doc in docs:
+        doc['card_html'] = card_cache.get(
+            template, doc['id'], version,
+            lambda: render_template(template, movie=doc)
+        )
+
+
 @app.route('/random')
 def random_search():
     """Redirect to a random search result."""
@@ -185,33 +351,234 @@ def similar_movies(doc_id):
     Args:
         doc_id: ID of the source movie
     """
-    # Get the source movie
-    source_movie = solr_client.get_by_id(doc_id)
-    
-    if not source_movie:
+    # Get the source movie and its similar movies in one Solr round trip
+    movie = prefetched(lambda: solr_client.get_movie(doc_id, rows=10, profile='similar', similar_profile='similar'))
+    return render_similar(movie, doc_id)
+
+
+async def load_similar_movies(doc_id):
+    """Solr data of the similar movies page, fetched on the event loop."""
+    return await async_solr_client.get_movie(doc_id, rows=10, profile='similar', similar_profile='similar')
+
+
+def render_similar(movie, doc_id):
+    """Render the similar movies page for a get_movie() result."""
+    if not movie:
         return render_template(
             'error.html',
             message=f"Movie with ID '{doc_id}' not found."
         ), 404
     
-    # Get similar movies
-    similar = solr_client.more_like_this(doc_id, rows=10)
-    
+    render_cards(movie['similar'], 'cards/similar.html')
     return render_template(
         'similar.html',
-        source_movie=source_movie,
-        similar_movies=similar['docs'],
-        num_similar=similar['num_found']
+        source_movie=movie['doc'],
+        similar_movies=movie['similar'],
+        num_similar=len(movie['similar'])
     )
 
 
+@app.route('/export')
+def export():
+    """
+    Stream every movie matching a search as NDJSON or CSV.
+
+    Accepts the same query and filter parameters as /search, plus:
+        format: 'ndjson' (default) or 'csv'
+        fields: Fields to include (can be multiple)
+    """
+    query = request.args.get('q', '*:*').strip() or '*:*'
+    filters = parse_filters(request.args)[0]
+    fields = [f for f in request.args.getlist('fields') if f in EXPORT_FIELDS] or DEFAULT_EXPORT_FIELDS
+    fmt = request.args.get('format', 'ndjson')
+
+    docs = solr_client.iter_documents(query=query, filters=filters, fields=fields)
+    # Fetch the first batch before answering, so an unreachable Solr gets
+    # a 503 instead of a 200 with an empty attachment
+    try:
+        first = list(itertools.islice(docs, 1))
+    except pysolr.SolrError as e:
+        print(f"Export error: {e}")
+        return render_template('error.html', message="Search is temporarily unavailable."), 503
+    docs = itertools.chain(first, docs)
+
+    if fmt == 'csv':
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(fields)
+            for doc in docs:
+                writer.writerow([
+                    '|'.join(str(v) for v in doc[f]) if isinstance(doc.get(f), list) else doc.get(f, '')
+                    for f in fields
+                ])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+
+        mimetype = 'text/csv'
+    else:
+        def generate():
+            for doc in docs:
+                yield json.dumps(doc, ensure_ascii=False) + '\n'
+
+        fmt = 'ndjson'
+        mimetype = 'application/x-ndjson'
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=movies.{fmt}'}
+    )
+
+
+@app.route('/api/batch', methods=['POST'])
+def api_batch():
+    """
+    API endpoint for running many searches in one call.
+
+    Expects a JSON body like:
+        {"queries": [{"query": "alien", "filters": {"genres": ["Horror"],
+                      "year": {"min": 1970, "max": 1990}}, "rows": 5}, ...],
+         "concurrency": 8, "deadline": 5}
+
+    Returns results in input order; a failed query gets an 'error' entry
+    instead of failing the whole batch.
+    """
+    body = request.get_json(silent=True) or {}
+    specs, options, error = parse_batch(body)
+    if error:
+        return jsonify({'error': error}), 400
+
+    results = prefetched(lambda: solr_client.batch_search(specs, **options))
+    return jsonify({'results': results})
+
+
+async def load_batch(body):
+    """Results of a batch search, run as concurrent coroutines on the event loop."""
+    try:
+        specs, options, error = parse_batch(json.loads(body) if body else {})
+    except ValueError:
+        error = 'Invalid JSON'
+    if error:
+        # api_batch answers 400 without calling Solr
+        return None
+    return await async_solr_client.batch_search(specs, **options)
+
+
+def parse_batch(body):
+    """
+    Validate a batch request body.
+
+    Returns:
+        Tuple of (search specs, {'concurrency', 'deadline'}, error message
+        or None)
+    """
+    if not isinstance(body, dict):
+        return None, None, 'Body must be a JSON object'
+    queries = body.get('queries')
+    if not isinstance(queries, list) or not queries:
+        return None, None, "Body must contain a non-empty 'queries' list"
+    if len(queries) > BATCH_MAX_QUERIES:
+        return None, None, f'At most {BATCH_MAX_QUERIES} queries per batch'
+
+    try:
+        options = {
+            'concurrency': max(1, _batch_number(body.get('concurrency', 8), 'concurrency', int)),
+            'deadline': min(_batch_number(body.get('deadline', BATCH_DEADLINE), 'deadline', float), BATCH_DEADLINE)
+        }
+        specs = [_batch_spec(item) for item in queries]
+    except ValueError as e:
+        return None, None, str(e)
+    return specs, options, None
+
+
+def _batch_number(value, name, kind):
+    """Convert a JSON number, rejecting booleans, strings and negatives."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise ValueError(f"'{name}' must be a non-negative number")
+    return kind(value)
+
+
+def _batch_spec(item):
+    """Validate one batch query and convert it to search() keyword arguments."""
+    if not isinstance(item, dict):
+        raise ValueError('Each query must be an object')
+
+    spec = {}
+    for key in ('query', 'sort', 'profile'):
+        if item.get(key) is not None:
+            if not isinstance(item[key], str):
+                raise ValueError(f"'{key}' must be a string")
+            spec[key] = item[key]
+    if 'profile' in spec and spec['profile'] not in SolrClient.FIELD_PROFILES:
+        raise ValueError(f"Unknown profile '{spec['profile']}'")
+    if 'highlight' in item:
+        if not isinstance(item['highlight'], bool):
+            raise ValueError("'highlight' must be true or false")
+        spec['highlight'] = item['highlight']
+    if item.get('facets') is not None:
+        facets = item['facets']
+        if not isinstance(facets, list) or not all(isinstance(f, str) for f in facets):
+            raise ValueError("'facets' must be a list of field names")
+        spec['facets'] = facets
+    spec['start'] = _batch_number(item.get('start', 0), 'start', int)
+    spec['rows'] = min(_batch_number(item.get('rows', 10), 'rows', int), BATCH_MAX_ROWS)
+
+    # JSON has no tuples, so ranges arrive as {"min": x, "max": y}
+    filters = item.get('filters')
+    if filters is None:
+        filters = {}
+    if not isinstance(filters, dict):
+        raise ValueError("'filters' must be an object")
+    spec['filters'] = {}
+    for field, value in filters.items():
+        if isinstance(value, dict):
+            bounds = (value.get('min'), value.get('max'))
+            if any(b is not None and (isinstance(b, bool) or not isinstance(b, (int, float))) for b in bounds):
+                raise ValueError(f"Range bounds of '{field}' must be numbers")
+            spec['filters'][field] = bounds
+        elif isinstance(value, list):
+            if not all(isinstance(v, (str, int, float)) for v in value):
+                raise ValueError(f"Values of '{field}' must be strings or numbers")
+            spec['filters'][field] = value
+        elif isinstance(value, (str, int, float)):
+            spec['filters'][field] = value
+        else:
+            raise ValueError(f"Filter '{field}' must be a value, a list or a range object")
+    return spec
+
+
 @app.route('/api/stats')
 def api_stats():
     """API endpoint for collection statistics."""
     stats = solr_client.stats()
+    stats['pool'] = solr_client.pool_stats()
+    stats['cache'] = solr_client.cache_stats()
+    stats['facet_cache'] = solr_client.facet_cache_stats()
+    stats['window_cache'] = solr_client.window_cache_stats()
+    stats['coalescing'] = solr_client.coalesce_stats()
+    stats['resilience'] = solr_client.breaker_stats()
+    stats['routing'] = solr_client.routing_stats()
+    stats['calls'] = solr_client.call_stats()
+    stats['conditional'] = {'not_modified': conditional_get.not_modified}
+    stats['compression'] = compressor.stats()
+    stats['query_guard'] = solr_client.guard_stats()
+    stats['facet_snapshot'] = facet_snapshot.stats()
+    stats['title_index'] = title_index.stats()
+    stats['autocomplete_cache'] = autocomplete_cache.stats()
+    stats['card_cache'] = card_cache.stats()
     return jsonify(stats)
 
 
+@app.route('/metrics')
+def metrics():
+    """Operational metrics in the Prometheus text exposition format."""
+    lines = route_metrics.render() + compressor.render() + card_cache.render() + render_solr_metrics(solr_client)
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/api/autocomplete')
 def api_autocomplete():
     """
@@ -221,14 +588,39 @@ def api_autocomplete():
     prefix = request.args.get('q', '').strip()
     if not prefix or len(prefix) < 2:
         return jsonify([])
+
+    # Suggestions fetched from Solr before the title index was built are
+    # dropped once it is, since they are ranked differently
+    suggestions = autocomplete_cache.get(
+        prefix, fetch_suggestions, limit=10, version=(solr_client.index_version(), title_index.builds)
+    )
+    return jsonify(suggestions)
+
+
+def fetch_suggestions(prefix, rows):
+    """
+    Ranked title suggestions for a prefix, for the autocomplete cache.
+
+    Returns:
+        List of suggestions, or None if they could not be fetched
+    """
+    # Most popular titles with a word starting with the prefix, from memory
+    suggestions = title_index.complete(prefix, limit=rows)
+    if suggestions is not None:
+        return suggestions
     
-    # Search for titles starting with prefix
+    # Index not built (yet): search for titles starting with prefix (escaped,
+    # so the input can't become a leading wildcard or other expensive syntax)
     results = solr_client.search(
-        query=f'title:{prefix}*',
-        rows=10
+        query=prefix_query('title', prefix),
+        rows=rows,
+        profile='autocomplete'
     )
+    if results.get('partial') or results.get('error'):
+        conditional_get.skip()
+        return None
     
-    suggestions = [
+    return [
         {
             'title': doc['title'],
             'year': doc.get('year', ''),
@@ -236,8 +628,6 @@ def api_autocomplete():
         }
         for doc in results['docs']
     ]
-    
-    return jsonify(suggestions)
 
 
 @app.errorhandler(404)
@@ -271,6 +661,16 @@ def join_with_comma(lst):
     return ', '.join(str(item) for item in lst)
 
 
+# Endpoint -> coroutine making the route's Solr calls, run by asgi.py
+# before the view. Called with the URL's view arguments, plus the request
+# body as 'body' for POST routes.
+ASYNC_LOADERS = {
+    'movie_detail': load_movie_detail,
+    'similar_movies': load_similar_movies,
+    'api_batch': load_batch,
+}
+
+
 if __name__ == '__main__':
     # Check if Solr is accessible
     stats = solr_client.stats()
@@ -0,0 +1,206 @@
+"""
+ASGI entry point.
+
+Run with an ASGI server, e.g.:
+    cd web && uvicorn asgi:application --workers 2
+
+Requests are handled by the Flask app in a thread pool. For the routes
+in app.ASYNC_LOADERS, the route's Solr calls are made first, as
+concurrent coroutines on the server's event loop (AsyncSolrClient), and
+their result is handed to the view in the WSGI environ: the worker
+thread only renders, and no thread waits while Solr answers. `python
+app.py` keeps the synchronous development server.
+"""
+
+import asyncio
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from flask import Flask
+from werkzeug.exceptions import HTTPException
+
+from app import ASYNC_LOADERS, PREFETCHED_KEY, app, async_solr_client
+from http_metrics import RECEIVED_KEY
+
+
+class LoaderAsgi:
+    """
+    ASGI application serving a Flask app, with async loaders for some routes.
+
+    The WSGI side of each request (the view, the request hooks and the
+    response iterable) runs in one pool thread; response chunks are sent
+    from it through the event loop, so a slow client holds that thread
+    like it would under a WSGI server. Before that, if the matched
+    endpoint has a loader, the loader is awaited on the loop and its
+    result stored under PREFETCHED_KEY in the environ.
+
+    Requests carrying If-None-Match are not prefetched: they may be
+    answered 304 before the view runs (see ConditionalGet). A loader that
+    fails is logged and the view makes its calls itself.
+    """
+
+    def __init__(
+        self,
+        flask_app: Flask,
+        loaders: Dict[str, Callable[..., Awaitable[Any]]],
+        threads: int = 32,
+        on_shutdown: Optional[Callable[[], Awaitable[None]]] = None
+    ):
+        """
+        Args:
+            flask_app: Flask app handling every request
+            loaders: Endpoint -> coroutine function called with the view
+                arguments (plus body=<request body> for POST requests)
+            threads: Requests handled by the Flask app at once
+            on_shutdown: Awaited when the server shuts down
+        """
+        self.app = flask_app
+        self.loaders = loaders
+        self.on_shutdown = on_shutdown
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+        self.prefetched = 0
+        self.loader_errors = 0
+
+    async def __call__(self, scope: Dict[str, Any], receive, send) -> None:
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        received = time.perf_counter()
+        body = await self._read_body(receive)
+        environ = self._environ(scope, body)
+        environ[RECEIVED_KEY] = received
+        await self._prefetch(environ, body)
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self._run_wsgi, environ, send, loop)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.on_shutdown is not None:
+                    await self.on_shutdown()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                break
+        return b''.join(chunks)
+
+    @staticmethod
+    def _environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+        """Build the WSGI environ of an ASGI HTTP request."""
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        root_path = scope.get('root_path', '')
+        path = scope['path']
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            # WSGI carries the raw bytes of the path as latin-1 text
+            'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+            'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope['headers']:
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name == 'CONTENT_LENGTH':
+                continue
+            key = name if name == 'CONTENT_TYPE' else f'HTTP_{name}'
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+        return environ
+
+    async def _prefetch(self, environ: Dict[str, Any], body: bytes) -> None:
+        """Await the loader of the request's endpoint, if it has one."""
+        if 'HTTP_IF_NONE_MATCH' in environ:
+            return
+        try:
+            endpoint, args = self.app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            return
+        load = self.loaders.get(endpoint)
+        if load is None:
+            return
+        if environ['REQUEST_METHOD'] == 'POST':
+            args = dict(args, body=body)
+
+        try:
+            environ[PREFETCHED_KEY] = await load(**args)
+            self.prefetched += 1
+        except Exception as e:
+            self.loader_errors += 1
+            print(f"Async loader error for {endpoint}: {e}")
+
+    def _run_wsgi(self, environ: Dict[str, Any], send, loop: asyncio.AbstractEventLoop) -> None:
+        """Call the Flask app and send its response (runs in a pool thread)."""
+        response_start: Dict[str, Any] = {}
+
+        def send_sync(message: Dict[str, Any]) -> None:
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def send_body(data: bytes, more: bool = True) -> None:
+            if not response_start.get('sent'):
+                send_sync({
+                    'type': 'http.response.start',
+                    'status': response_start['status'],
+                    'headers': response_start['headers'],
+                })
+                response_start['sent'] = True
+            if data or not more:
+                send_sync({'type': 'http.response.body', 'body': data, 'more_body': more})
+
+        def start_response(status: str, headers: List[tuple], exc_info=None):
+            if exc_info is not None and response_start.get('sent'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response_start['status'] = int(status.split(' ', 1)[0])
+            response_start['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers
+            ]
+            return send_body
+
+        result = self.app(environ, start_response)
+        try:
+            for chunk in result:
+                if chunk:
+                    send_body(chunk)
+            send_body(b'', more=False)
+        finally:
+            close = getattr(result, 'close', None)
+            if close is not None:
+                close()
+
+
+application = LoaderAsgi(app, ASYNC_LOADERS, on_shutdown=async_solr_client.aclose)
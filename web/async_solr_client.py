@@ -0,0 +1,408 @@
+"""
+Asyncio Solr client interface.
+"""
+
+import asyncio
+import json
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Union
+from urllib.parse import urlencode
+
+import httpx
+import pysolr
+
+from single_flight import AsyncSingleFlight
+from solr_cache import ResultCache, make_key
+from solr_client import SolrQueries
+from solr_guard import QueryGuard
+from solr_metrics import CallMetrics
+from solr_replicas import ReplicaSet
+from solr_resilience import CircuitBreaker, RetryBudget, SolrUnavailable
+from solr_response import loads
+
+
+class AsyncSolrClient(SolrQueries):
+    """
+    Non-blocking interface for querying Solr movies collection.
+
+    Has the same methods as SolrClient, as coroutines returning the same
+    dict shapes, so several Solr calls can be awaited concurrently with
+    asyncio.gather() instead of one after another.
+
+    Reads go through the same layers as SolrClient: result and facet
+    caches, coalescing of identical requests, the circuit breaker and
+    retry budget, and replica routing. Pass a SolrClient's caches,
+    breaker, retry budget and replica set to share their state (and the
+    replica health checks) between both clients. Reads are not hedged.
+    """
+
+    def __init__(
+        self,
+        solr_url: Union[str, List[str]] = 'http://localhost:8983/solr/movies',
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        cache: Optional[ResultCache] = None,
+        cache_bytes: int = 32 * 1024 * 1024,
+        cache_ttl: float = 300.0,
+        facet_cache: Optional[ResultCache] = None,
+        version_check_interval: float = 2.0,
+        coalesce: bool = True,
+        fast_decode: bool = True,
+        guard: Optional[QueryGuard] = None,
+        metrics: Optional[CallMetrics] = None,
+        replicas: Optional[ReplicaSet] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        retry_budget: Optional[RetryBudget] = None,
+        max_retries: int = 1
+    ):
+        """
+        Args:
+            solr_url: Base URL of the movies collection, or a list of the
+                collection's URLs on each replica (ignored with replicas)
+            max_connections: Maximum concurrent in-flight requests per event loop
+            max_keepalive: Idle connections kept open for reuse
+            connect_timeout: Seconds to wait for a connection to Solr
+            read_timeout: Seconds to wait for Solr to answer
+            cache: Result cache to share (e.g. with a SolrClient)
+            cache_bytes: Memory limit of a new result cache (0 disables it)
+            cache_ttl: Seconds a cached result stays valid
+            facet_cache: Facet counts reused across pages (see SolrClient.search)
+            version_check_interval: Seconds between index version checks
+            coalesce: Share one Solr call between identical concurrent requests
+            fast_decode: Decode responses with the fast path (see SolrResponse)
+            guard: Admission rules for searches (default: QueryGuard())
+            metrics: Call histograms to record into (e.g. a SolrClient's),
+                default: a new CallMetrics
+            replicas: Replica set to route reads over (e.g. a SolrClient's),
+                default: a new one over solr_url with its own health checks
+            breaker: Circuit breaker to share (default: a new one)
+            retry_budget: Retry budget to share (default: a new one)
+            max_retries: Retries per failed read, subject to the retry budget
+        """
+        self.fast_decode = fast_decode
+        self.guard = guard or QueryGuard()
+        self.metrics = metrics or CallMetrics()
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        if replicas is None:
+            urls = [solr_url] if isinstance(solr_url, str) else list(solr_url)
+            replicas = ReplicaSet(urls)
+            if len(replicas) > 1:
+                replicas.start(self._ping)
+        self.replicas = replicas
+        self.solr_url = replicas.replicas[0].url
+        if cache is None and cache_bytes > 0:
+            cache = ResultCache(max_bytes=cache_bytes, ttl=cache_ttl)
+        self.cache = cache
+        self.facet_cache = facet_cache
+        self.flights = AsyncSingleFlight() if coalesce else None
+        self.breaker = breaker or CircuitBreaker()
+        self.retry_budget = retry_budget or RetryBudget()
+        self.max_retries = max_retries
+        self.version_check_interval = version_check_interval
+        self._index_version = None
+        self._version_checked = 0.0
+        # httpx connections belong to the event loop that opened them
+        self._clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]' = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _client(self) -> httpx.AsyncClient:
+        """Get the connection pool for the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            self._clients[loop] = client
+        return client
+
+    async def _request(self, params: Dict[str, Any], handler: str = 'select') -> bytes:
+        """
+        Send a read request through the circuit breaker and retry budget (see SolrClient._request).
+
+        Raises:
+            SolrUnavailable: If the breaker is open or Solr keeps failing
+            pysolr.SolrError: If Solr rejects the request (4xx)
+        """
+        if not self.breaker.allow():
+            raise SolrUnavailable('Solr circuit breaker is open; failing fast')
+        self.retry_budget.deposit()
+
+        attempt = 0
+        while True:
+            try:
+                payload = await self._send(params, handler)
+            except SolrUnavailable:
+                self.breaker.record_failure()
+                if attempt < self.max_retries and self.breaker.allow() and self.retry_budget.withdraw():
+                    attempt += 1
+                    continue
+                raise
+            except pysolr.SolrError:
+                # Solr answered, it just didn't like the request
+                self.breaker.record_success()
+                raise
+
+            self.breaker.record_success()
+            return payload
+
+    async def _send(self, params: Dict[str, Any], handler: str = 'select') -> bytes:
+        """
+        Send a single read request to a replica and return the raw JSON body.
+
+        Raises:
+            SolrUnavailable: On connection failures, timeouts or 5xx responses
+            pysolr.SolrError: On other non-200 responses
+        """
+        params = dict(params)
+        params['wt'] = 'json'
+        encoded = urlencode(params, doseq=True)
+
+        # Version checks stay on one node, as in SolrClient._send
+        sticky = handler == 'admin/luke'
+        replica = self.replicas.preferred() if sticky else self.replicas.acquire()
+        url = f'{replica.url}/{handler}'
+
+        started = time.monotonic()
+        try:
+            if len(encoded) < 1024:
+                resp = await self._client().get(f'{url}?{encoded}')
+            else:
+                resp = await self._client().post(
+                    url,
+                    content=encoded,
+                    headers={'Content-type': 'application/x-www-form-urlencoded; charset=utf-8'}
+                )
+        except httpx.HTTPError as e:
+            self._release(replica, sticky, failed=True)
+            raise SolrUnavailable(f"Failed to reach Solr at {url}: {e}")
+        except BaseException:
+            # Cancelled (e.g. a batch deadline): not the replica's fault
+            if not sticky:
+                self.replicas.abandon(replica)
+            raise
+
+        elapsed = time.monotonic() - started
+        if resp.status_code >= 500:
+            self._release(replica, sticky, failed=True)
+            raise SolrUnavailable(f"Solr responded with an error (HTTP {resp.status_code}): {resp.text[:200]}")
+        self._release(replica, sticky, elapsed)
+        if resp.status_code != 200:
+            raise pysolr.SolrError(f"Solr responded with an error (HTTP {resp.status_code}): {resp.text[:200]}")
+
+        return resp.content
+
+    def _release(self, replica, sticky: bool, seconds: Optional[float] = None, failed: bool = False) -> None:
+        """Report a request's outcome to the replica set."""
+        if not sticky:
+            self.replicas.release(replica, seconds, failed)
+        elif failed:
+            self.replicas.record_failure(replica)
+        else:
+            self.replicas.record_success(replica)
+
+    def _ping(self, url: str) -> bool:
+        """Health check used to re-admit an ejected replica (runs in the health check thread)."""
+        resp = httpx.get(f'{url}/admin/ping', params={'wt': 'json'}, timeout=self.timeout)
+        return resp.status_code == 200 and resp.json().get('status') == 'OK'
+
+    async def _execute(self, params: Dict[str, Any], handler: str = 'select', cached: bool = True) -> Any:
+        """Run a Solr query through the result cache (see SolrClient._execute)."""
+        key = make_key(handler, params)
+        version = None
+        use_cache = cached and self.cache is not None
+        if use_cache:
+            version = await self.index_version()
+            payload = self.cache.get(key, version)
+            if payload is not None:
+                return self._decode(payload, cached=True)
+
+        if self.flights is not None:
+            # Identical requests already in flight share that response
+            payload = await self.flights.do(key, lambda: self._request(params, handler))
+        else:
+            payload = await self._request(params, handler)
+
+        results = self._decode(payload)
+        if use_cache and not self._is_partial(results):
+            self.cache.set(key, payload, version)
+        return results
+
+    async def index_version(self) -> Optional[int]:
+        """
+        Get the current Lucene index version of the collection.
+
+        Returns:
+            Index version, or None if Solr cannot be reached
+        """
+        now = time.monotonic()
+        if now - self._version_checked < self.version_check_interval:
+            return self._index_version
+
+        # Set first so concurrent callers don't all issue the check
+        self._version_checked = now
+        try:
+            info = json.loads(await self._request({'numTerms': 0, 'show': 'index'}, handler='admin/luke'))
+            self._index_version = info.get('index', {}).get('version')
+        except (pysolr.SolrError, ValueError) as e:
+            print(f"Index version check error: {e}")
+        return self._index_version
+
+    async def search(
+        self,
+        query: str = '*:*',
+        filters: Optional[Dict[str, Any]] = None,
+        facets: Optional[List[str]] = None,
+        sort: Optional[str] = None,
+        start: int = 0,
+        rows: int = 10,
+        highlight: bool = False,
+        cursor_mark: Optional[str] = None,
+        profile: Optional[str] = None
+    ) -> Dict:
+        """Perform a search query on Solr (see SolrClient.search)."""
+        requested = self._search_params(query, filters, facets, sort, start, rows, highlight, cursor_mark, profile)
+        params = self._admit(requested)
+        capped = any(int(params.get(name, 0)) != int(requested.get(name, 0)) for name in ('start', 'rows'))
+
+        try:
+            with self._timed('search'):
+                facet_key = None
+                stored_facets = None
+                if facets and self.facet_cache is not None:
+                    facet_key = self._facet_key(params)
+                    version = await self.index_version()
+                    payload = self.facet_cache.get(facet_key, version)
+                    if payload is not None:
+                        stored_facets = loads(payload)
+                        params = {name: value for name, value in params.items() if not name.startswith('facet')}
+                        params['facet'] = 'false'
+
+                response = self._parse_search(await self._execute(params))
+                if stored_facets is not None:
+                    response['facets'] = stored_facets
+                elif facet_key is not None and not response['partial']:
+                    self.facet_cache.set(facet_key, json.dumps(response['facets']).encode('utf-8'), version)
+                response['capped'] = capped
+                return response
+        except Exception as e:
+            print(f"Solr search error: {e}")
+            return {'docs': [], 'num_found': 0, 'facets': {}, 'error': str(e)}
+
+    async def batch_search(
+        self,
+        queries: List[Dict[str, Any]],
+        concurrency: int = 8,
+        deadline: Optional[float] = None
+    ) -> List[Dict]:
+        """
+        Run many independent searches concurrently (see SolrClient.batch_search).
+
+        Returns:
+            One result per spec, in input order. Searches that fail or are
+            still running at the deadline return an empty result with an
+            'error' message.
+        """
+        if not queries:
+            return []
+        limit = asyncio.Semaphore(max(1, concurrency))
+
+        async def run(spec: Dict[str, Any]) -> Dict:
+            async with limit:
+                return await self.search(**spec)
+
+        tasks = [asyncio.ensure_future(run(spec)) for spec in queries]
+        await asyncio.wait(tasks, timeout=deadline)
+
+        results = []
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+                results.append({'docs': [], 'num_found': 0, 'facets': {}, 'error': 'Batch deadline exceeded'})
+            elif task.exception() is not None:
+                results.append({'docs': [], 'num_found': 0, 'facets': {}, 'error': str(task.exception())})
+            else:
+                results.append(task.result())
+        return results
+
+    async def get_movie(
+        self,
+        movie_id: str,
+        rows: int = 5,
+        profile: str = 'detail',
+        similar_profile: str = 'strip'
+    ) -> Optional[Dict[str, Any]]:
+        """Fetch a single movie by ID, including similar movies (More Like This)."""
+        try:
+            with self._timed('get_movie'):
+                if similar_profile == profile:
+                    return self._parse_movie(await self._execute(self._movie_params(movie_id, rows, profile)), movie_id)
+                # Neighbours need their own field list, so they are a second, concurrent request
+                results, neighbours = await asyncio.gather(
+                    self._execute(self._doc_params(movie_id, profile)),
+                    self._execute(self._neighbour_params(movie_id, rows, similar_profile))
+                )
+                return self._parse_movie(results, movie_id, neighbours)
+        except Exception as e:
+            print(f"Error fetching movie {movie_id}: {e}")
+            return None
+
+    async def get_facet_values(self, field: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Get available values for a facet field."""
+        try:
+            with self._timed('get_facet_values'):
+                results = await self._execute(self._facet_values_params(field, limit))
+                return self._parse_facet_values(results, field)
+        except Exception as e:
+            print(f"Error fetching facets for {field}: {e}")
+            return []
+
+    async def more_like_this(
+        self,
+        doc_id: str,
+        mlt_fields: List[str] = None,
+        rows: int = 5
+    ) -> Dict:
+        """Find similar movies using MoreLikeThis."""
+        params = self._mlt_params(doc_id, mlt_fields, rows)
+        try:
+            with self._timed('more_like_this'):
+                return self._parse_mlt(await self._execute(params), doc_id)
+        except Exception as e:
+            print(f"MoreLikeThis error: {e}")
+            return {
+                'docs': [],
+                'num_found': 0,
+                'error': str(e)
+            }
+
+    async def get_by_id(self, doc_id: str) -> Optional[Dict]:
+        """Get a specific movie by ID."""
+        try:
+            with self._timed('get_by_id'):
+                return self._parse_by_id(await self._execute(self._by_id_params(doc_id)))
+        except Exception as e:
+            print(f"Get by ID error: {e}")
+            return None
+
+    async def stats(self) -> Dict:
+        """Get collection statistics."""
+        try:
+            with self._timed('stats'):
+                return self._parse_stats(await self._execute(self._stats_params(), cached=False))
+        except Exception as e:
+            return {
+                'total_docs': 0,
+                'status': 'error',
+                'error': str(e)
+            }
+
+    async def aclose(self) -> None:
+        """Close the connection pool of the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
@@ -0,0 +1,156 @@
+"""
+Prefix-extension cache for autocomplete suggestions.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from title_index import normalize
+
+
+def matches(doc: Dict[str, Any], key: str) -> bool:
+    """Whether a word of the doc's title starts with a normalized prefix."""
+    return f' {normalize(doc["title"])}'.find(f' {key}') >= 0
+
+
+class _Entry:
+    __slots__ = ('candidates', 'complete', 'hits')
+
+    def __init__(self, candidates: List[Dict[str, Any]], complete: bool):
+        self.candidates = candidates
+        self.complete = complete
+        self.hits = 0
+
+
+class PrefixCache:
+    """
+    LRU cache of ranked autocomplete candidates per prefix.
+
+    Typing "inc", "ince", "incep" asks for ever longer prefixes. Each
+    prefix stores up to `candidates` ranked suggestions, more than a
+    response shows. When that list is complete (the source had no more
+    matches), the answer for any longer prefix is exactly the stored list
+    filtered to titles still matching, in the same order, so it is derived
+    without asking the source again. Truncated lists are only reused for
+    the exact same prefix.
+
+    Entries are dropped when the index version changes.
+    """
+
+    def __init__(self, max_entries: int = 4096, candidates: int = 50):
+        """
+        Args:
+            max_entries: Prefixes kept before the least recently used is evicted
+            candidates: Suggestions fetched and stored per prefix
+        """
+        self.max_entries = max_entries
+        self.candidates = candidates
+        self.hits = 0
+        self.extensions = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[str, _Entry]' = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _store(self, key: str, entry: _Entry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _lookup(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Candidates for a key from the cache, or None (caller holds the lock)."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.hits += 1
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry.candidates
+
+        # Longest cached shorter prefix with a complete candidate list
+        for end in range(len(key) - 1, 0, -1):
+            shorter = self._entries.get(key[:end])
+            if shorter is None or not shorter.complete:
+                continue
+            shorter.hits += 1
+            self.extensions += 1
+            self._entries.move_to_end(key[:end])
+            candidates = [doc for doc in shorter.candidates if matches(doc, key)]
+            self._store(key, _Entry(candidates, True))
+            return candidates
+        return None
+
+    def get(
+        self,
+        prefix: str,
+        fetch: Callable[[str, int], Optional[List[Dict[str, Any]]]],
+        limit: int = 10,
+        version: Any = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get suggestions for a prefix, from the cache when possible.
+
+        Args:
+            prefix: Raw user input
+            fetch: Called as fetch(prefix, n) on a miss; returns up to n
+                ranked suggestions, or None if the source failed (the
+                result is then not cached)
+            limit: Suggestions returned
+            version: Current index version; a change clears the cache
+
+        Returns:
+            Up to limit suggestions, best first
+        """
+        key = normalize(prefix)
+        if not key:
+            return []
+
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            candidates = self._lookup(key)
+            if candidates is not None:
+                return candidates[:limit]
+            self.misses += 1
+
+        candidates = fetch(prefix, self.candidates)
+        if candidates is None:
+            return []
+        with self._lock:
+            if version == self._version:
+                self._store(key, _Entry(candidates, len(candidates) < self.candidates))
+        return candidates[:limit]
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self, top: int = 20) -> Dict[str, Any]:
+        """
+        Get cache counters and the most used prefixes.
+
+        Args:
+            top: Number of prefixes to list
+
+        Returns:
+            Dictionary with exact hits, prefix extensions, misses, hit
+            ratio, entries, evictions and the hit count of the top prefixes
+        """
+        with self._lock:
+            lookups = self.hits + self.extensions + self.misses
+            busiest = sorted(self._entries.items(), key=lambda item: -item[1].hits)[:top]
+            return {
+                'hits': self.hits,
+                'extensions': self.extensions,
+                'misses': self.misses,
+                'hit_ratio': round((self.hits + self.extensions) / lookups, 4) if lookups else 0.0,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'evictions': self.evictions,
+                'top_prefixes': {key: entry.hits for key, entry in busiest if entry.hits}
+            }
@@ -0,0 +1,242 @@
+"""
+Negotiated gzip/brotli compression of text responses.
+"""
+
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from flask import Flask, Response, request
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is used without it
+    brotli = None
+
+
+class _Encoder:
+    """Incremental compressor for one response body."""
+
+    def __init__(self, encoding: str, level: int):
+        if encoding == 'br':
+            self._obj = brotli.Compressor(quality=level)
+        else:
+            # wbits=31: zlib stream with a gzip header and trailer
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+        self.encoding = encoding
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data) if self.encoding == 'br' else self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        """Emit everything buffered so far, keeping the stream open."""
+        if self.encoding == 'br':
+            return self._obj.flush()
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.finish() if self.encoding == 'br' else self._obj.flush(zlib.Z_FINISH)
+
+
+class Compressor:
+    """
+    Compress text responses with the best encoding the client accepts.
+
+    Brotli is preferred when the brotli package is installed and the
+    client accepts it, gzip otherwise. Levels default to fast settings
+    (gzip 5, brotli 4): on HTML and JSON of a few KB they get most of the
+    size reduction of the maximum levels for a fraction of the CPU time.
+    Bodies under min_size are sent as-is, since framing overhead and CPU
+    outweigh the saving. Streamed responses are compressed chunk by chunk
+    and flushed once flush_bytes of input are pending or flush_interval
+    has passed since the last flush: a sync flush per small chunk costs
+    framing bytes and resets the compressor's matching, while this still
+    gets rows to the client promptly.
+
+    Bytes in/out and the CPU time spent are counted per encoding (see
+    stats()), so the saving can be weighed against its cost.
+    """
+
+    MIMETYPES = {
+        'text/html', 'text/plain', 'text/css', 'text/csv', 'text/javascript',
+        'application/json', 'application/javascript', 'application/x-ndjson',
+    }
+
+    def __init__(
+        self,
+        app: Optional[Flask] = None,
+        min_size: int = 1024,
+        gzip_level: int = 5,
+        brotli_quality: int = 4,
+        flush_bytes: int = 32 * 1024,
+        flush_interval: float = 0.5
+    ):
+        """
+        Args:
+            app: Flask app to register on (or call init_app later)
+            min_size: Smallest body (bytes) worth compressing
+            gzip_level: zlib level 1-9
+            brotli_quality: Brotli quality 0-11
+            flush_bytes: Uncompressed bytes of a stream buffered before a flush
+            flush_interval: Seconds after which pending stream data is
+                flushed anyway (checked as chunks arrive)
+        """
+        self.min_size = min_size
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.levels = {'gzip': gzip_level, 'br': brotli_quality}
+        self.skipped_small = 0
+        self._counters = {
+            encoding: {'responses': 0, 'streamed': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_seconds': 0.0}
+            for encoding in self.levels
+        }
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        """Register the response hook on a Flask app."""
+        app.after_request(self._after)
+
+    def _negotiate(self) -> Optional[str]:
+        accepted = request.accept_encodings
+        gzip_q = accepted['gzip']
+        if brotli is not None:
+            br_q = accepted['br']
+            if br_q and br_q >= gzip_q:
+                return 'br'
+        return 'gzip' if gzip_q else None
+
+    def _record(self, encoding: str, size_in: int, size_out: int, cpu: float, streamed: bool = False) -> None:
+        with self._lock:
+            counters = self._counters[encoding]
+            counters['responses'] += 1
+            counters['streamed'] += streamed
+            counters['bytes_in'] += size_in
+            counters['bytes_out'] += size_out
+            counters['cpu_seconds'] += cpu
+
+    def _after(self, response: Response) -> Response:
+        # Partial content and file responses (static files, which support
+        # Range requests and carry strong ETags) are left as they are: a
+        # compressed byte range would not match its Content-Range
+        if (
+            response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough
+            or 'Content-Range' in response.headers
+            or response.mimetype not in self.MIMETYPES
+            or 'Content-Encoding' in response.headers
+            or request.method == 'HEAD'
+        ):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = self._negotiate()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self._stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+            response.headers['Content-Encoding'] = encoding
+            return response
+
+        body = response.get_data()
+        if len(body) < self.min_size:
+            with self._lock:
+                self.skipped_small += 1
+            return response
+
+        started = time.thread_time()
+        encoder = _Encoder(encoding, self.levels[encoding])
+        compressed = encoder.compress(body) + encoder.finish()
+        self._record(encoding, len(body), len(compressed), time.thread_time() - started)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def _stream(self, chunks: Iterable[Any], encoding: str) -> Iterator[bytes]:
+        """Compress a streamed body, flushing every flush_bytes or flush_interval."""
+        encoder = _Encoder(encoding, self.levels[encoding])
+        size_in = size_out = 0
+        pending = 0
+        flushed_at = time.monotonic()
+        cpu = 0.0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                if not chunk:
+                    continue
+                size_in += len(chunk)
+                pending += len(chunk)
+                started = time.thread_time()
+                out = encoder.compress(chunk)
+                now = time.monotonic()
+                if pending >= self.flush_bytes or now - flushed_at >= self.flush_interval:
+                    out += encoder.flush()
+                    pending = 0
+                    flushed_at = now
+                cpu += time.thread_time() - started
+                if out:
+                    size_out += len(out)
+                    yield out
+            started = time.thread_time()
+            out = encoder.finish()
+            cpu += time.thread_time() - started
+            size_out += len(out)
+            yield out
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+            self._record(encoding, size_in, size_out, cpu, streamed=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get compression savings against CPU cost.
+
+        Returns:
+            Dictionary with responses skipped as too small and, per
+            encoding, bytes in/out, bytes saved, ratio and CPU milliseconds
+        """
+        with self._lock:
+            result: Dict[str, Any] = {'min_size': self.min_size, 'skipped_small': self.skipped_small}
+            for encoding, c in self._counters.items():
+                saved = c['bytes_in'] - c['bytes_out']
+                cpu_ms = c['cpu_seconds'] * 1000
+                result[encoding] = {
+                    'level': self.levels[encoding],
+                    'responses': c['responses'],
+                    'streamed': c['streamed'],
+                    'bytes_in': c['bytes_in'],
+                    'bytes_out': c['bytes_out'],
+                    'bytes_saved': saved,
+                    'ratio': round(c['bytes_out'] / c['bytes_in'], 4) if c['bytes_in'] else None,
+                    'cpu_ms': round(cpu_ms, 3),
+                    'bytes_saved_per_cpu_ms': round(saved / cpu_ms) if cpu_ms else None
+                }
+            result['brotli_available'] = brotli is not None
+            return result
+
+    def render(self) -> List[str]:
+        """Exposition lines for /metrics."""
+        stats = self.stats()
+        lines = [
+            '# HELP http_compression_bytes_total Response bytes before and after compression.',
+            '# TYPE http_compression_bytes_total counter',
+        ]
+        for encoding in self.levels:
+            lines.append(f'http_compression_bytes_total{{encoding="{encoding}",stage="in"}} {stats[encoding]["bytes_in"]}')
+            lines.append(f'http_compression_bytes_total{{encoding="{encoding}",stage="out"}} {stats[encoding]["bytes_out"]}')
+        lines += [
+            '# HELP http_compression_cpu_seconds_total CPU time spent compressing responses.',
+            '# TYPE http_compression_cpu_seconds_total counter',
+        ]
+        for encoding in self.levels:
+            lines.append(
+                f'http_compression_cpu_seconds_total{{encoding="{encoding}"}} {stats[encoding]["cpu_ms"] / 1000}'
+            )
+        return lines
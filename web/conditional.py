@@ -0,0 +1,128 @@
+"""
+Conditional GET support (ETag / If-None-Match) keyed on the Solr index version.
+"""
+
+import hashlib
+import os
+from typing import Callable, Iterable, Optional
+
+from flask import Flask, Response, g, request
+
+
+def fingerprint_files(*paths: str) -> str:
+    """
+    Short content hash of files and directory trees.
+
+    Used as a render version: it changes whenever a template (or other
+    listed file) changes, and is the same in every worker process.
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(
+                os.path.join(root, name)
+                for root, _, names in os.walk(path)
+                for name in names
+            )
+        else:
+            files = [path]
+        for name in files:
+            digest.update(name.encode('utf-8'))
+            with open(name, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+class ConditionalGet:
+    """
+    ETags for pages whose content only changes when the index does.
+
+    The ETag of a GET is derived from the Solr index version, the route,
+    the sorted query arguments and a render version (e.g. a fingerprint
+    of the templates). A request whose If-None-Match matches is answered
+    304 before the view runs, so no Solr query is made. Responses carry
+    Cache-Control so a CDN or reverse proxy can serve repeats itself.
+
+    When the index version is unknown (Solr unreachable), or a view calls
+    skip() (e.g. for partial results), responses get no ETag and are
+    marked no-store.
+    """
+
+    def __init__(
+        self,
+        app: Optional[Flask] = None,
+        version: Optional[Callable[[], Optional[int]]] = None,
+        routes: Iterable[str] = (),
+        render_version: str = '',
+        max_age: int = 30,
+        shared_max_age: int = 120
+    ):
+        """
+        Args:
+            app: Flask app to register on (or call init_app later)
+            version: Function returning the current index version
+            routes: Route rules to handle (e.g. '/movie/<movie_id>')
+            render_version: Changes whenever rendered output changes for
+                the same data (templates, view code)
+            max_age: Seconds browsers may reuse a response without revalidating
+            shared_max_age: Seconds shared caches (CDN, proxy) may reuse it
+        """
+        self.version = version
+        self.routes = set(routes)
+        self.render_version = render_version
+        self.cache_control = f'public, max-age={max_age}, s-maxage={shared_max_age}'
+        self.not_modified = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        """Register the request hooks on a Flask app."""
+        app.before_request(self._before)
+        app.after_request(self._after)
+
+    @staticmethod
+    def skip() -> None:
+        """Don't cache the response of the current request."""
+        g.conditional_skip = True
+
+    def _handles(self) -> bool:
+        if request.method not in ('GET', 'HEAD') or request.url_rule is None:
+            return False
+        return request.url_rule.rule in self.routes
+
+    def etag(self, version: int) -> str:
+        """ETag for the current request at an index version."""
+        args = sorted(request.args.items(multi=True))
+        key = repr((version, self.render_version, request.path, args))
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+
+    def _before(self) -> Optional[Response]:
+        if not self._handles():
+            return None
+        version = self.version()
+        if version is None:
+            return None
+
+        etag = self.etag(version)
+        g.conditional_etag = etag
+        if request.if_none_match.contains_weak(etag):
+            self.not_modified += 1
+            response = Response(status=304)
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = self.cache_control
+            return response
+        return None
+
+    def _after(self, response: Response) -> Response:
+        etag = g.pop('conditional_etag', None)
+        if not self._handles() or response.status_code == 304:
+            return response
+        if etag is None or g.pop('conditional_skip', False) or response.status_code != 200:
+            response.headers['Cache-Control'] = 'no-store'
+            return response
+
+        # Weak: the representation may be re-encoded (e.g. compressed)
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = self.cache_control
+        response.vary.add('Accept-Encoding')
+        return response
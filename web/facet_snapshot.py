@@ -0,0 +1,124 @@
+"""
+Precomputed global facet counts.
+"""
+
+import threading
+from typing import Any, Dict, List, Optional
+
+from solr_client import SolrClient
+
+
+class FacetSnapshot:
+    """
+    In-memory copy of the facet distributions over the whole index.
+
+    Counts for an unfiltered match-all query only change when the index
+    does, so they are computed with one JSON Facet API request per index
+    version and refreshed by a background thread. Requests read the
+    snapshot without calling Solr.
+    """
+
+    # Field -> number of values kept (-1 for all)
+    FIELDS = {'genres': 100, 'year': -1}
+
+    def __init__(
+        self,
+        solr_client: SolrClient,
+        fields: Optional[Dict[str, int]] = None,
+        refresh_interval: float = 30.0
+    ):
+        """
+        Args:
+            solr_client: Client used to compute the snapshot
+            fields: Field -> value limit to snapshot (default: FIELDS)
+            refresh_interval: Seconds between index version checks
+        """
+        self.solr_client = solr_client
+        self.fields = fields or self.FIELDS
+        self.refresh_interval = refresh_interval
+        self.version = None
+        self.refreshes = 0
+        self._facets: Dict[str, List[Dict[str, Any]]] = {}
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Compute the snapshot and keep it fresh in a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background refresh."""
+        self._stopped.set()
+
+    def _run(self) -> None:
+        while True:
+            self.refresh()
+            if self._stopped.wait(self.refresh_interval):
+                return
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Recompute the snapshot if the index version changed.
+
+        Args:
+            force: Recompute even if the version is unchanged
+
+        Returns:
+            True if a new snapshot was stored
+        """
+        version = self.solr_client.index_version()
+        # Without a known version, recompute on every refresh to stay safe
+        if self._facets and not force and version is not None and version == self.version:
+            return False
+
+        facets = self.solr_client.get_json_facets(self.fields)
+        if facets is None:
+            return False
+
+        # Swap in one assignment so readers never see a partial snapshot
+        self._facets = facets
+        self.version = version
+        self.refreshes += 1
+        return True
+
+    def get(self, field: str, limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get the global value counts for one field.
+
+        Args:
+            field: Facet field
+            limit: Maximum number of values to return
+
+        Returns:
+            List of value/count dicts, or None if no snapshot is available yet
+        """
+        values = self._facets.get(field)
+        if values is None:
+            return None
+        return values[:limit] if limit else values
+
+    def facets(self, fields: List[str], limit: Optional[int] = None) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """
+        Get several fields at once, in the shape SolrClient.search() returns.
+
+        Returns:
+            Dictionary of field -> value/count dicts, or None if any field is missing
+        """
+        result = {}
+        for field in fields:
+            values = self.get(field, limit)
+            if values is None:
+                return None
+            result[field] = values
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Get snapshot state."""
+        return {
+            'ready': bool(self._facets),
+            'index_version': self.version,
+            'refreshes': self.refreshes,
+            'fields': {field: len(values) for field, values in self._facets.items()}
+        }
@@ -0,0 +1,151 @@
+"""
+Cache of rendered HTML fragments (movie cards) per document.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from markupsafe import Markup
+
+
+class FragmentCache:
+    """
+    Thread-safe LRU cache of rendered markup with a memory limit in bytes.
+
+    A movie card depends only on the document's stored fields and the
+    card template, so it is keyed by (template, doc id, index version,
+    template version): popular movies that show up on many result and
+    similar pages are rendered once per reindex instead of on every page.
+    Anything that depends on the request (highlighted snippets, the
+    query) must stay outside the cached fragment.
+
+    Entries from an older index version can never be hit again, so they
+    are all dropped when the version changes. When the version is
+    unknown (Solr unreachable) fragments are rendered but not stored.
+    """
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024, template_version: str = ''):
+        """
+        Args:
+            max_bytes: Upper bound on the total size of cached fragments
+            template_version: Changes whenever the fragment templates change
+        """
+        self.max_bytes = max_bytes
+        self.template_version = template_version
+        self._entries: 'OrderedDict[Tuple[str, str, Any, str], Tuple[Markup, int]]' = OrderedDict()
+        self._bytes = 0
+        self._version: Optional[Any] = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(
+        self,
+        template: str,
+        doc_id: str,
+        version: Optional[Any],
+        render: Callable[[], str]
+    ) -> Markup:
+        """
+        Get a rendered fragment, rendering and storing it on a miss.
+
+        Args:
+            template: Fragment template name (fragments of different
+                templates for the same doc are kept apart)
+            doc_id: Document the fragment shows
+            version: Current index version, or None if unknown
+            render: Called with no arguments on a miss; returns the HTML
+
+        Returns:
+            The fragment as Markup, safe to insert into a template
+        """
+        if version is None:
+            with self._lock:
+                self.uncached += 1
+            return Markup(render())
+
+        key = (template, doc_id, version, self.template_version)
+        with self._lock:
+            if version != self._version:
+                if self._version is not None:
+                    self._entries.clear()
+                    self._bytes = 0
+                    self.invalidations += 1
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Rendered outside the lock; two concurrent misses both render,
+        # and the second store replaces the first
+        html = Markup(render())
+        size = len(html.encode('utf-8')) + len(template) + len(doc_id)
+        if size > self.max_bytes:
+            return html
+
+        with self._lock:
+            if version != self._version:
+                return html
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            while self._entries and self._bytes + size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+            self._entries[key] = (html, size)
+            self._bytes += size
+        return html
+
+    def clear(self) -> None:
+        """Drop every cached fragment."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters for sizing.
+
+        Returns:
+            Dictionary with hit/miss counts, hit ratio, memory usage,
+            evictions and fragments rendered without caching
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'uncached': self.uncached,
+                'index_version': self._version,
+                'template_version': self.template_version
+            }
+
+    def render(self) -> List[str]:
+        """Exposition lines for /metrics."""
+        stats = self.stats()
+        return [
+            '# HELP fragment_cache_hits_total Rendered card lookups that hit.',
+            '# TYPE fragment_cache_hits_total counter',
+            f'fragment_cache_hits_total {stats["hits"]}',
+            '# HELP fragment_cache_misses_total Rendered card lookups that missed.',
+            '# TYPE fragment_cache_misses_total counter',
+            f'fragment_cache_misses_total {stats["misses"]}',
+            '# HELP fragment_cache_bytes Memory held by cached fragments.',
+            '# TYPE fragment_cache_bytes gauge',
+            f'fragment_cache_bytes {stats["bytes"]}',
+        ]
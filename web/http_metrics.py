@@ -0,0 +1,204 @@
+"""
+Prometheus metrics for the web app and its Solr client.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from flask import Flask, g, request
+
+from solr_metrics import Histogram
+
+
+# WSGI environ key with the perf_counter() time a server received the
+# request, for servers that do part of the work before calling the app
+# (asgi.py runs the Solr calls of some routes first)
+RECEIVED_KEY = 'movie_ir.received'
+
+def _labels(**labels: Any) -> str:
+    if not labels:
+        return ''
+    text = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels.items()
+    )
+    return '{' + text + '}'
+
+
+def _histogram(lines: List[str], name: str, snapshot: Dict[str, Any], **labels: Any) -> None:
+    """Append a histogram snapshot (see Histogram.snapshot) in exposition format."""
+    for bound, count in snapshot['buckets'].items():
+        lines.append(f'{name}_bucket{_labels(**labels, le=bound)} {count}')
+    lines.append(f'{name}_sum{_labels(**labels)} {snapshot["sum"]}')
+    lines.append(f'{name}_count{_labels(**labels)} {snapshot["count"]}')
+
+
+class RouteMetrics:
+    """
+    Request counts, latency histograms and in-flight requests per Flask route.
+
+    Routes are labelled by their rule (e.g. /movie/<movie_id>), so the
+    number of series stays fixed however many URLs are requested. Each
+    request costs two clock reads and one short locked update.
+    """
+
+    # Seconds
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, app: Optional[Flask] = None, exclude: tuple = ('static',)):
+        """
+        Args:
+            app: Flask app to instrument (or call init_app later)
+            exclude: Endpoints not to record
+        """
+        self.exclude = set(exclude)
+        self.in_flight = 0
+        self._requests: Dict[tuple, int] = {}
+        self._latency: Dict[str, Histogram] = {}
+        self._errors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        """Register the request hooks on a Flask app."""
+        app.before_request(self._before)
+        app.after_request(self._after)
+        app.teardown_request(self._teardown)
+
+    def _before(self) -> None:
+        if request.endpoint in self.exclude:
+            return
+        g.metrics_started = request.environ.get(RECEIVED_KEY) or time.perf_counter()
+        g.metrics_status = 500
+        with self._lock:
+            self.in_flight += 1
+
+    def _after(self, response):
+        if 'metrics_started' in g:
+            g.metrics_status = response.status_code
+        return response
+
+    def _teardown(self, error: Optional[BaseException]) -> None:
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        status = 500 if error is not None else g.pop('metrics_status', 500)
+
+        with self._lock:
+            self.in_flight -= 1
+            key = (route, request.method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            histogram = self._latency.get(route)
+            if histogram is None:
+                histogram = self._latency[route] = Histogram(self.BUCKETS)
+            histogram.observe(elapsed)
+            if status >= 500:
+                self._errors[route] = self._errors.get(route, 0) + 1
+
+    def render(self) -> List[str]:
+        """Exposition lines for the HTTP series."""
+        with self._lock:
+            requests = dict(self._requests)
+            latency = {route: h.snapshot() for route, h in self._latency.items()}
+            errors = dict(self._errors)
+            in_flight = self.in_flight
+
+        lines = [
+            '# HELP http_requests_total HTTP requests by route, method and status.',
+            '# TYPE http_requests_total counter',
+        ]
+        for (route, method, status), count in sorted(requests.items()):
+            lines.append(f'http_requests_total{_labels(route=route, method=method, status=status)} {count}')
+
+        lines += [
+            '# HELP http_request_duration_seconds Time to handle a request, by route.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for route, snapshot in sorted(latency.items()):
+            _histogram(lines, 'http_request_duration_seconds', snapshot, route=route)
+
+        lines += [
+            '# HELP http_request_errors_total Requests answered with a 5xx status or an exception.',
+            '# TYPE http_request_errors_total counter',
+        ]
+        for route, count in sorted(errors.items()):
+            lines.append(f'http_request_errors_total{_labels(route=route)} {count}')
+
+        lines += [
+            '# HELP http_requests_in_flight Requests currently being handled.',
+            '# TYPE http_requests_in_flight gauge',
+            f'http_requests_in_flight {in_flight}',
+        ]
+        return lines
+
+
+def render_solr_metrics(solr_client) -> List[str]:
+    """
+    Exposition lines for a SolrClient: call latencies, caches, pool and replicas.
+
+    Everything is read from the client's existing *_stats() counters, so
+    nothing extra is recorded on the request path.
+    """
+    lines: List[str] = []
+    calls = solr_client.call_stats()
+
+    histograms = [
+        ('solr_call_duration_milliseconds', 'wall_ms', 'Wall time of SolrClient calls, by method.'),
+        ('solr_call_qtime_milliseconds', 'qtime_ms', 'QTime reported by Solr, by method.'),
+        ('solr_call_parse_milliseconds', 'parse_ms', 'Client-side response decoding time, by method.'),
+        ('solr_call_response_bytes', 'bytes', 'Response body size, by method.'),
+    ]
+    for name, key, help_text in histograms:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for method, entry in sorted(calls.items()):
+            _histogram(lines, name, entry[key], method=method)
+
+    counters = [
+        ('solr_calls_total', 'calls', 'SolrClient calls, by method.'),
+        ('solr_call_errors_total', 'errors', 'SolrClient calls that failed, by method.'),
+    ]
+    for name, key, help_text in counters:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for method, entry in sorted(calls.items()):
+            lines.append(f'{name}{_labels(method=method)} {entry[key]}')
+
+    caches = {
+        'result': solr_client.cache_stats(),
+        'facet': solr_client.facet_cache_stats(),
+        'window': solr_client.window_cache_stats(),
+    }
+    caches = {name: stats for name, stats in caches.items() if stats.get('enabled')}
+    lines += ['# HELP solr_cache_hits_total Cache lookups that hit.', '# TYPE solr_cache_hits_total counter']
+    lines += [f'solr_cache_hits_total{_labels(cache=name)} {s["hits"]}' for name, s in caches.items()]
+    lines += ['# HELP solr_cache_misses_total Cache lookups that missed.', '# TYPE solr_cache_misses_total counter']
+    lines += [f'solr_cache_misses_total{_labels(cache=name)} {s["misses"]}' for name, s in caches.items()]
+    lines += ['# HELP solr_cache_hit_ratio Hits over lookups since start.', '# TYPE solr_cache_hit_ratio gauge']
+    lines += [f'solr_cache_hit_ratio{_labels(cache=name)} {s["hit_ratio"]}' for name, s in caches.items()]
+    lines += ['# HELP solr_cache_bytes Memory held by the cache.', '# TYPE solr_cache_bytes gauge']
+    lines += [f'solr_cache_bytes{_labels(cache=name)} {s["bytes"]}' for name, s in caches.items()]
+
+    pool = solr_client.pool_stats()
+    lines += ['# HELP solr_pool_connections HTTP connections to Solr by state.', '# TYPE solr_pool_connections gauge']
+    for state in ('in_use', 'idle', 'waiting'):
+        lines.append(f'solr_pool_connections{_labels(state=state)} {pool[state]}')
+
+    resilience = solr_client.breaker_stats()
+    lines += [
+        '# HELP solr_breaker_open Whether the circuit breaker is failing calls fast.',
+        '# TYPE solr_breaker_open gauge',
+        f'solr_breaker_open {int(resilience["breaker"]["state"] != "closed")}',
+        '# HELP solr_retries_total Reads retried after a failure.',
+        '# TYPE solr_retries_total counter',
+        f'solr_retries_total {resilience["retry_budget"]["retries"]}',
+    ]
+
+    replicas = solr_client.routing_stats()['replicas']
+    lines += ['# HELP solr_replica_up Whether the replica is in rotation.', '# TYPE solr_replica_up gauge']
+    lines += [f'solr_replica_up{_labels(replica=url)} {int(not r["ejected"])}' for url, r in replicas.items()]
+    lines += ['# HELP solr_replica_errors_total Failed requests per replica.', '# TYPE solr_replica_errors_total counter']
+    lines += [f'solr_replica_errors_total{_labels(replica=url)} {r["errors"]}' for url, r in replicas.items()]
+    return lines
@@ -0,0 +1,141 @@
+"""
+Request coalescing for identical concurrent calls.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    """One in-flight call and the threads waiting on it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """
+    Collapse identical concurrent calls into one.
+
+    The first caller for a key runs the function; callers arriving with the
+    same key while it is running wait and receive the same result (or the
+    same exception) instead of repeating the work.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.saved = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once for all concurrent callers using the same key.
+
+        Args:
+            key: Identity of the call
+            fn: Function producing the result
+
+        Returns:
+            Result of fn, shared between all waiting callers
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                self.saved += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get coalescing counters.
+
+        Returns:
+            Dictionary with executed calls, saved calls and calls in flight
+        """
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'saved': self.saved,
+                'in_flight': len(self._calls)
+            }
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutines.
+
+    The first caller for a key starts fn as a task; callers arriving while
+    it runs await the same task. Tasks belong to their event loop, so a
+    caller on another loop runs its own call.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.executed = 0
+        self.saved = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await fn once for all concurrent callers using the same key.
+
+        Args:
+            key: Identity of the call
+            fn: Coroutine function producing the result
+
+        Returns:
+            Result of fn, shared between all waiting callers
+        """
+        call = self._calls.get(key)
+        if call is not None and call.get_loop() is asyncio.get_running_loop():
+            self.saved += 1
+            # Shielded: a caller giving up (e.g. a batch deadline) must
+            # not cancel the call for the others
+            return await asyncio.shield(call)
+
+        call = asyncio.ensure_future(fn())
+        self._calls[key] = call
+        self.executed += 1
+
+        def forget(_):
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+        call.add_done_callback(forget)
+        return await asyncio.shield(call)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get coalescing counters.
+
+        Returns:
+            Dictionary with executed calls, saved calls and calls in flight
+        """
+        return {
+            'executed': self.executed,
+            'saved': self.saved,
+            'in_flight': len(self._calls)
+        }
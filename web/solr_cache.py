@@ -0,0 +1,195 @@
+"""
+In-process result cache for Solr responses.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+# Parameters whose multiple values are order-independent
+UNORDERED_PARAMS = {'fq', 'facet.field', 'hl.fl'}
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a free-text query for use in a cache key.
+
+    Only whitespace is collapsed. Case is kept: the query is also matched
+    against string fields (genres, cast, directors) that compare exactly,
+    so "Drama" and "drama" can return different results.
+
+    Args:
+        query: Raw query string
+
+    Returns:
+        Normalized query string
+    """
+    return ' '.join((query or '*:*').split())
+
+
+def make_key(handler: str, params: Dict[str, Any]) -> str:
+    """
+    Build a canonical cache key from Solr request parameters.
+
+    Args:
+        handler: Request handler the parameters are sent to
+        params: Solr request parameters
+
+    Returns:
+        Key string that is identical for logically identical requests
+    """
+    canonical = []
+    for name in sorted(params):
+        value = params[name]
+        if isinstance(value, (list, tuple)):
+            value = [str(v) for v in value]
+            if name in UNORDERED_PARAMS:
+                value = sorted(set(value))
+        elif name == 'q':
+            value = normalize_query(str(value))
+        else:
+            value = str(value)
+        canonical.append((name, value))
+    return handler + '?' + json.dumps(canonical, separators=(',', ':'))
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache with TTL expiry and a memory limit in bytes.
+
+    Values are raw response bodies (bytes), so their size is known exactly
+    and every hit decodes into fresh objects that callers may mutate.
+    The whole cache is dropped when the index version it was filled
+    against changes.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl: float = 300.0):
+        """
+        Args:
+            max_bytes: Upper bound on the total size of cached entries
+            ttl: Seconds an entry stays valid
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: 'OrderedDict[Hashable, Tuple[float, bytes, int]]' = OrderedDict()
+        self._bytes = 0
+        self._version: Optional[Any] = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_version(self, version: Optional[Any]) -> None:
+        # Caller holds the lock
+        if version is None or version == self._version:
+            return
+        if self._version is not None:
+            self._entries.clear()
+            self._bytes = 0
+            self.invalidations += 1
+        self._version = version
+
+    def get(self, key: Hashable, version: Optional[Any] = None) -> Optional[bytes]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Cache key (see make_key)
+            version: Current index version; a change clears the cache
+
+        Returns:
+            Cached bytes or None on a miss
+        """
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, payload, size = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def peek(self, key: Hashable, version: Optional[Any] = None) -> Optional[bytes]:
+        """
+        Look up an entry without counting a hit or miss or refreshing its recency.
+
+        Args:
+            key: Cache key (see make_key)
+            version: Current index version; entries of another version don't match
+
+        Returns:
+            Cached bytes or None
+        """
+        with self._lock:
+            if version is not None and version != self._version:
+                return None
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            return entry[1]
+
+    def set(self, key: Hashable, payload: bytes, version: Optional[Any] = None) -> None:
+        """
+        Store a response, evicting least recently used entries to fit.
+
+        Args:
+            key: Cache key (see make_key)
+            payload: Raw response body
+            version: Index version the response was produced from
+        """
+        size = len(payload) + len(str(key))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._check_version(version)
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            while self._entries and self._bytes + size > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+            self._entries[key] = (time.monotonic() + self.ttl, payload, size)
+            self._bytes += size
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters for sizing.
+
+        Returns:
+            Dictionary with hit/miss counts, hit ratio and memory usage
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'index_version': self._version
+            }
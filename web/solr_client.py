@@ -2,19 +2,108 @@
 Solr client interface.
 """
 
+import codecs
+import contextvars
+from contextlib import nullcontext
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+import re
+import threading
+import time
+
 import pysolr
-from typing import Dict, List, Optional, Any
+import requests
+from typing import Dict, Iterator, List, Optional, Any, Union
 from urllib.parse import urlencode
 
+from solr_cache import ResultCache, make_key
+from solr_filters import build_filter_queries, facet_fields
+from solr_guard import QueryGuard
+from solr_metrics import CallMetrics
+from solr_replicas import ReplicaSet
+from solr_response import SolrResponse, loads
+from solr_resilience import CircuitBreaker, LatencyTracker, RetryBudget, SolrUnavailable
+from single_flight import SingleFlight
+from solr_transport import SolrTransport
+from solr_writer import SolrWriter
 
-class SolrClient:
-    """Interface for querying Solr movies collection."""
-    
-    def __init__(self, solr_url: str = 'http://localhost:8983/solr/movies'):
-        self.solr = pysolr.Solr(solr_url, always_commit=True, timeout=10)
-        self.solr_url = solr_url
-    
-    def search(
+
+class SolrQueries:
+    """
+    Request builders and response parsers shared by the sync and async clients.
+
+    Each public client method is split into a ``_*_params`` builder, one
+    Solr request, and a ``_parse_*`` step, so both clients send identical
+    requests and return identical dict shapes.
+    """
+
+    SEARCH_FIELDS = 'id,title,year,rating,tomatometer,genres,directors,cast,plot,reviews,url,site,num_reviews,poster'
+
+    # Field lists per view, so each page only pulls what it renders.
+    # 'results' leaves out plot/reviews: its snippets come from highlighting.
+    FIELD_PROFILES = {
+        'results': 'id,title,year,rating,tomatometer,genres,directors,cast,url,site,poster',
+        'detail': 'id,title,year,rating,tomatometer,genres,directors,cast,plot,reviews,url,site,poster',
+        'similar': 'id,title,year,rating,genres,directors,cast,plot,url,site,poster',
+        'strip': 'id,title,year,poster',
+        'autocomplete': 'id,title,year',
+    }
+
+    # Characters of plot/review shown as a result snippet. Solr is asked
+    # for one more so the views can tell when the text was cut.
+    SNIPPET_LENGTH = 300
+
+    MLT_FIELDS = ['plot', 'title', 'genres', 'cast', 'directors', 'reviews']
+
+    # Facet counts for a filtered field ignore that field's own filter, so
+    # every value of a multi-select facet stays selectable with a true count
+    MULTI_SELECT_FACETS = True
+
+    # Decode responses into SolrResponse views (orjson when installed)
+    # instead of pysolr.Results built from stdlib json
+    fast_decode = True
+
+    # Admission rules applied to searches built from user input (None disables)
+    guard: Optional[QueryGuard] = None
+
+    # Per-method call histograms (None disables)
+    metrics: Optional[CallMetrics] = None
+
+    def _decode(self, payload: bytes, cached: bool = False) -> Any:
+        """Decode a raw Solr JSON body into a results object."""
+        started = time.perf_counter()
+        if self.fast_decode:
+            results = SolrResponse(loads(payload))
+        else:
+            results = pysolr.Results(json.loads(payload))
+        if self.metrics is not None:
+            qtime = results.raw_response.get('responseHeader', {}).get('QTime')
+            self.metrics.response(len(payload), time.perf_counter() - started, qtime, cached)
+        return results
+
+    def _timed(self, method: str):
+        """Context manager timing one public call (see CallMetrics.call)."""
+        return self.metrics.call(method) if self.metrics is not None else nullcontext()
+
+    @staticmethod
+    def _is_partial(results: pysolr.Results) -> bool:
+        """Check whether Solr stopped early (timeAllowed) and returned partial results."""
+        return bool(results.raw_response.get('responseHeader', {}).get('partialResults'))
+
+    def _admit(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Pass search parameters through the query guard, if any."""
+        return self.guard.admit(params) if self.guard is not None else params
+
+    @staticmethod
+    def _facet_key(params: Dict[str, Any]) -> str:
+        """Cache key for the facet counts of a search, ignoring paging, sort and display options."""
+        page_params = {'start', 'rows', 'sort', 'cursorMark', 'fl', 'timeAllowed'}
+        return make_key('facets', {
+            name: value for name, value in params.items()
+            if name not in page_params and not name.startswith('hl') and not name.startswith('f.plot.hl')
+        })
+
+    def _search_params(
         self,
         query: str = '*:*',
         filters: Optional[Dict[str, Any]] = None,
@@ -22,13 +111,15 @@ class SolrClient:
         sort: Optional[str] = None,
         start: int = 0,
         rows: int = 10,
-        highlight: bool = False
-    ) -> Dict:
-        """Perform a search query on Solr."""
+        highlight: bool = False,
+        cursor_mark: Optional[str] = None,
+        profile: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build Solr parameters for a search query."""
         # Build base params
         is_match_all = (not query) or (query == '*:*')
 
-        fields = 'id,title,year,rating,tomatometer,genres,directors,cast,plot,reviews,url,site,num_reviews,poster'
+        fields = self.FIELD_PROFILES[profile] if profile else self.SEARCH_FIELDS
 
         if is_match_all:
             params = {
@@ -51,29 +142,30 @@ class SolrClient:
                 'fl': fields,
             }
 
-        # Add sort
-        if sort:
-            params['sort'] = sort
-
-        # Add filter queries
-        if filters:
-            fq_list = []
-            for field, value in filters.items():
-                if isinstance(value, list):
-                    # Multiple values for same field (OR)
-                    or_clauses = [f'{field}:"{v}"' for v in value]
-                    fq_list.append(f"({' OR '.join(or_clauses)})")
-                elif isinstance(value, tuple) and len(value) == 2:
-                    # Range query (e.g., year:[2000 TO 2024])
-                    fq_list.append(f'{field}:[{value[0]} TO {value[1]}]')
-                else:
-                    fq_list.append(f'{field}:"{value}"')
+        # The sort always ends with the uniqueKey as a tie-breaker, so
+        # pages fetched with and without a cursor (which needs a total
+        # order) list documents in the same order. The primary sort is the
+        # caller's, or relevance as Solr would use by default.
+        sort = sort or 'score desc'
+        if not re.search(r'\bid\s+(asc|desc)\b', sort):
+            sort = f'{sort}, id asc'
+
+        # Cursor paging replaces start
+        if cursor_mark is not None:
+            params['start'] = 0
+            params['cursorMark'] = cursor_mark
+
+        params['sort'] = sort
+
+        # Add filter queries (canonical and tagged, see solr_filters)
+        fq_list = build_filter_queries(filters, tag=self.MULTI_SELECT_FACETS)
+        if fq_list:
             params['fq'] = fq_list
 
         # Add faceting
         if facets:
             params['facet'] = 'true'
-            params['facet.field'] = facets
+            params['facet.field'] = facet_fields(facets, filters, multi_select=self.MULTI_SELECT_FACETS)
             params['facet.mincount'] = 1
             params['facet.limit'] = 20
 
@@ -84,76 +176,840 @@ class SolrClient:
             params['hl.simple.pre'] = '<mark>'
             params['hl.simple.post'] = '</mark>'
             params['hl.fragsize'] = 200
+            # Without a match, fall back to the start of the plot so the
+            # view never needs the full stored text
+            params['hl.defaultSummary'] = 'true'
+            params['f.plot.hl.alternateField'] = 'plot'
+            params['hl.maxAlternateFieldLength'] = self.SNIPPET_LENGTH + 1
 
-        # Execute search
-        try:
-            results = self.solr.search(**params)
-            
-            # Process facets
-            processed_facets = {}
-            if hasattr(results, 'facets') and 'facet_fields' in results.facets:
-                for field, values in results.facets['facet_fields'].items():
-                    processed_facets[field] = [
-                        {'value': val, 'count': count}
-                        for val, count in zip(values[0::2], values[1::2])
-                    ]
-            
-            # Parse response
-            response = {
-                'docs': results.docs,
-                'num_found': results.hits,
-                'facets': processed_facets,
-                'highlighting': results.highlighting if hasattr(results, 'highlighting') else {}
-            }
-            
-            return response
+        return params
+
+    def _parse_search(self, results: pysolr.Results) -> Dict:
+        """Convert search results into the dict shape used by the views."""
+        return {
+            'docs': results.docs,
+            'num_found': results.hits,
+            'facets': self._parse_facets(results.facets),
+            'highlighting': results.highlighting if hasattr(results, 'highlighting') else {},
+            'next_cursor_mark': results.nextCursorMark,
+            'partial': self._is_partial(results)
+        }
+
+    def _movie_params(self, movie_id: str, rows: int = 5, profile: str = 'detail') -> Dict[str, Any]:
+        """Build Solr parameters for a document plus its MoreLikeThis neighbours."""
+        # Same MLT settings as more_like_this(), attached to the query that
+        # fetches the source document. MLT neighbours share the same fl.
+        params = self._mlt_params(movie_id, rows=rows)
+        del params['mlt.interestingTerms']
+        params.update({
+            'q': f'id:"{movie_id}"',
+            'rows': 1,
+            'fl': self.FIELD_PROFILES[profile],
+        })
+        return params
+
+    def _neighbour_params(self, movie_id: str, rows: int = 5, profile: str = 'strip') -> Dict[str, Any]:
+        """Build Solr parameters for MoreLikeThis neighbours only, with their own field list."""
+        params = self._mlt_params(movie_id, rows=rows)
+        del params['mlt.interestingTerms']
+        params.update({'rows': 1, 'fl': self.FIELD_PROFILES[profile]})
+        return params
+
+    def _doc_params(self, movie_id: str, profile: str = 'detail') -> Dict[str, Any]:
+        """Build Solr parameters for one document by ID."""
+        return {'q': f'id:"{movie_id}"', 'rows': 1, 'fl': self.FIELD_PROFILES[profile]}
+
+    def _parse_movie(
+        self,
+        results: pysolr.Results,
+        movie_id: str,
+        neighbours: Optional[pysolr.Results] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Split a document + MLT response into 'doc' and 'similar'.
+
+        The neighbours come from the same response unless a separate
+        neighbours response (see _neighbour_params) is given.
+        """
+        if not results.docs:
+            return None
+
+        return {
+            'doc': results.docs[0],
+            'similar': self._parse_mlt(neighbours if neighbours is not None else results, movie_id)['docs']
+        }
+
+    def _facet_values_params(self, field: str, limit: int = 20) -> Dict[str, Any]:
+        """Build Solr parameters for the values of one facet field."""
+        return {
+            'q': '*:*',
+            'rows': 0,
+            'facet': 'true',
+            'facet.field': field,
+            'facet.limit': limit,
+            'facet.mincount': 1
+        }
+
+    def _parse_facet_values(self, results: pysolr.Results, field: str) -> List[Dict[str, Any]]:
+        """Convert one facet field of a response into value/count dicts."""
+        return self._parse_facets(results.facets).get(field, [])
+
+    def _json_facet_params(self, limits: Dict[str, int]) -> Dict[str, Any]:
+        """Build a JSON Facet API request for terms facets over the whole index."""
+        spec = {
+            field: {'type': 'terms', 'field': field, 'limit': limit, 'mincount': 1}
+            for field, limit in limits.items()
+        }
+        return {
+            'q': '*:*',
+            'rows': 0,
+            'json.facet': json.dumps(spec, sort_keys=True)
+        }
+
+    def _parse_json_facets(self, results: pysolr.Results, fields: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Convert JSON Facet API buckets into the value/count dicts used by facet.field."""
+        facets = results.raw_response.get('facets', {})
+        return {
+            # facet.field returns values as strings, so do the same here
+            field: [
+                {'value': str(bucket['val']), 'count': bucket['count']}
+                for bucket in facets.get(field, {}).get('buckets', [])
+            ]
+            for field in fields
+        }
+
+    def _mlt_params(self, doc_id: str, mlt_fields: Optional[List[str]] = None, rows: int = 5) -> Dict[str, Any]:
+        """Build Solr parameters for a MoreLikeThis query."""
+        if mlt_fields is None:
+            # Use fields that actually exist in our data
+            mlt_fields = self.MLT_FIELDS
+
+        return {
+            'q': f'id:{doc_id}',
+            'mlt': 'true',
+            'mlt.fl': ','.join(mlt_fields),
+            'mlt.mindf': 1,
+            'mlt.mintf': 1,
+            'mlt.count': rows,
+            'mlt.interestingTerms': 'details',
+            'fl': self.FIELD_PROFILES['similar'],
+        }
+
+    def _parse_mlt(self, results: pysolr.Results, doc_id: str) -> Dict:
+        """Extract the MoreLikeThis documents for doc_id from a response."""
+        similar_docs = []
+
+        # Check raw_response for moreLikeThis as pysolr might not parse it
+        if hasattr(results, 'raw_response') and 'moreLikeThis' in results.raw_response:
+            mlt_data = results.raw_response['moreLikeThis'].get(doc_id, {})
+            if isinstance(mlt_data, dict):
+                similar_docs = mlt_data.get('docs', [])
+            else:
+                similar_docs = list(mlt_data)
+        elif hasattr(results, 'moreLikeThis') and results.moreLikeThis:
+            mlt_data = results.moreLikeThis.get(doc_id, {})
+            if isinstance(mlt_data, dict):
+                similar_docs = mlt_data.get('docs', [])
+            else:
+                similar_docs = list(mlt_data)
+
+        return {
+            'docs': similar_docs,
+            'num_found': len(similar_docs),
+            'source_id': doc_id
+        }
+
+    def _by_id_params(self, doc_id: str) -> Dict[str, Any]:
+        """Build Solr parameters for fetching one document."""
+        return {'q': f'id:{doc_id}', 'rows': 1}
+
+    def _parse_by_id(self, results: pysolr.Results) -> Optional[Dict]:
+        """Return the first document of a response, if any."""
+        if results.docs:
+            return results.docs[0]
+        return None
+
+    def _stats_params(self) -> Dict[str, Any]:
+        """Build Solr parameters for the collection document count."""
+        return {'q': '*:*', 'rows': 0}
+
+    def _parse_stats(self, results: pysolr.Results) -> Dict:
+        """Convert a match-all count into the stats dict."""
+        return {
+            'total_docs': results.hits,
+            'status': 'ok'
+        }
+
+    def _parse_facets(self, facet_data: Dict) -> Dict:
+        """
+        Parse facet data from Solr response.
+        
+        Args:
+            facet_data: Raw facet data from Solr
             
+        Returns:
+            Parsed facet dictionary
+        """
+        if not facet_data or 'facet_fields' not in facet_data:
+            return {}
+        
+        parsed_facets = {}
+        for field, values in facet_data['facet_fields'].items():
+            # Solr returns facets as [value1, count1, value2, count2, ...]
+            facet_list = []
+            for i in range(0, len(values), 2):
+                if i + 1 < len(values):
+                    facet_list.append({
+                        'value': values[i],
+                        'count': values[i + 1]
+                    })
+            parsed_facets[field] = facet_list
+        
+        return parsed_facets
+
+
+class SolrClient(SolrQueries):
+    """
+    Read-only interface for querying Solr movies collection.
+
+    Writes go through SolrWriter (see writer()), which batches them and
+    never forces a hard commit per request.
+
+    Given several replica URLs, reads are spread over them by a
+    ReplicaSet; writes go to the first URL.
+    """
+    
+    def __init__(
+        self,
+        solr_url: Union[str, List[str]] = 'http://localhost:8983/solr/movies',
+        pool_size: int = 10,
+        keep_alive: bool = True,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        transport: Optional[SolrTransport] = None,
+        cache_bytes: int = 32 * 1024 * 1024,
+        cache_ttl: float = 300.0,
+        version_check_interval: float = 2.0,
+        coalesce: bool = True,
+        max_retries: int = 1,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        hedge: bool = False,
+        fast_decode: bool = True,
+        facet_cache_bytes: int = 4 * 1024 * 1024,
+        window_cache_bytes: int = 16 * 1024 * 1024,
+        guard: Optional[QueryGuard] = None,
+        metrics: Optional[CallMetrics] = None,
+        routing: str = ReplicaSet.LEAST_OUTSTANDING,
+        eject_after: int = 3,
+        health_check_interval: float = 5.0
+    ):
+        """
+        Args:
+            solr_url: Base URL of the movies collection, or a list of the
+                collection's URLs on each replica to balance reads over
+            pool_size: Maximum number of pooled connections to each Solr replica
+            keep_alive: Reuse HTTP connections between requests
+            connect_timeout: Seconds to wait for a connection to Solr
+            read_timeout: Seconds to wait for Solr to answer
+            transport: Existing transport to share instead of creating one
+            cache_bytes: Memory limit of the result cache (0 disables it)
+            cache_ttl: Seconds a cached result stays valid
+            version_check_interval: Seconds between index version checks
+            coalesce: Share one Solr call between identical concurrent requests
+            max_retries: Retries per failed read, subject to the retry budget
+            failure_threshold: Consecutive failures that open the circuit breaker
+            reset_timeout: Seconds the breaker stays open before a trial call
+            hedge: Send a duplicate read when one takes longer than the
+                recent p95 latency, and use whichever answers first
+            fast_decode: Decode responses with the fast path (see SolrResponse)
+            facet_cache_bytes: Memory limit for facet counts reused across
+                pages of the same query (0 disables reuse)
+            window_cache_bytes: Memory limit for result windows served by
+                search_page() (0 disables windowing)
+            guard: Admission rules for searches (default: QueryGuard())
+            metrics: Call histograms to record into (default: a new CallMetrics)
+            routing: How reads pick a replica ('least_outstanding' or 'latency')
+            eject_after: Consecutive failures that take a replica out of rotation
+            health_check_interval: Seconds between pings of failing replicas
+        """
+        urls = [solr_url] if isinstance(solr_url, str) else list(solr_url)
+        self.transport = transport or SolrTransport(
+            pool_size=pool_size,
+            hosts=len(urls),
+            keep_alive=keep_alive,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout
+        )
+        self.replicas = ReplicaSet(
+            urls, strategy=routing, eject_after=eject_after, health_check_interval=health_check_interval
+        )
+        self.solr_url = self.replicas.replicas[0].url
+        if len(self.replicas) > 1:
+            self.replicas.start(self._ping)
+        self.fast_decode = fast_decode
+        self.guard = guard or QueryGuard()
+        self.metrics = metrics or CallMetrics()
+        self.cache = ResultCache(max_bytes=cache_bytes, ttl=cache_ttl) if cache_bytes > 0 else None
+        self.facet_cache = ResultCache(max_bytes=facet_cache_bytes, ttl=cache_ttl) if facet_cache_bytes > 0 else None
+        self.window_cache = ResultCache(max_bytes=window_cache_bytes, ttl=cache_ttl) if window_cache_bytes > 0 else None
+        self._prefetch_pool: Optional[ThreadPoolExecutor] = None
+        self._movie_pool: Optional[ThreadPoolExecutor] = None
+        self.prefetches = 0
+        self.version_check_interval = version_check_interval
+        self._index_version = None
+        self._version_checked = 0.0
+        self._version_lock = threading.Lock()
+        self.flights = SingleFlight() if coalesce else None
+
+        self.breaker = CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+        self.retry_budget = RetryBudget()
+        self.max_retries = max_retries
+        self.latency = LatencyTracker()
+        self.hedge = hedge
+        self.min_hedge_delay = 0.05
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self._hedge_pool = ThreadPoolExecutor(max_workers=self.transport.pool_size) if hedge else None
+
+    def _request(self, params: Dict[str, Any], handler: str = 'select') -> bytes:
+        """
+        Send a read request through the circuit breaker and retry budget.
+
+        Reads are idempotent, so failed attempts are retried (while the
+        budget allows) and, with hedging on, slow attempts are duplicated.
+
+        Raises:
+            SolrUnavailable: If the breaker is open or Solr keeps failing
+            pysolr.SolrError: If Solr rejects the request (4xx)
+        """
+        if not self.breaker.allow():
+            raise SolrUnavailable('Solr circuit breaker is open; failing fast')
+        self.retry_budget.deposit()
+
+        attempt = 0
+        while True:
+            try:
+                payload = self._send_hedged(params, handler) if self.hedge else self._send(params, handler)
+            except SolrUnavailable:
+                self.breaker.record_failure()
+                if attempt < self.max_retries and self.breaker.allow() and self.retry_budget.withdraw():
+                    attempt += 1
+                    continue
+                raise
+            except pysolr.SolrError:
+                # Solr answered, it just didn't like the request
+                self.breaker.record_success()
+                raise
+
+            self.breaker.record_success()
+            return payload
+
+    def _send_hedged(self, params: Dict[str, Any], handler: str) -> bytes:
+        """Send a request, duplicating it if it outlives the recent p95 latency."""
+        p95 = self.latency.percentile(95)
+        if p95 is None:
+            return self._send(params, handler)
+
+        first = self._hedge_pool.submit(self._send, params, handler)
+        done, _ = wait([first], timeout=max(p95, self.min_hedge_delay))
+        if done:
+            return first.result()
+
+        self.hedges_sent += 1
+        second = self._hedge_pool.submit(self._send, params, handler)
+        error = None
+        for future in as_completed([first, second]):
+            try:
+                payload = future.result()
+            except pysolr.SolrError as e:
+                error = e
+                continue
+            if future is second:
+                self.hedges_won += 1
+            return payload
+        raise error
+
+    def _send(self, params: Dict[str, Any], handler: str = 'select') -> bytes:
+        """
+        Send a single read request to Solr and return the raw JSON body.
+
+        Long parameter lists are sent as a form POST, like pysolr does.
+
+        Raises:
+            SolrUnavailable: On connection failures, timeouts or 5xx responses
+            pysolr.SolrError: On other non-200 responses
+        """
+        params = dict(params)
+        params['wt'] = 'json'
+        encoded = urlencode(params, doseq=True)
+
+        # Index versions differ between replicas, so version checks stay
+        # on one node; everything else is load balanced
+        replica = self.replicas.preferred() if handler == 'admin/luke' else self.replicas.acquire()
+        url = f'{replica.url}/{handler}'
+
+        started = time.monotonic()
+        try:
+            if len(encoded) < 1024:
+                resp = self.transport.session.get(f'{url}?{encoded}', timeout=self.transport.timeout)
+            else:
+                resp = self.transport.session.post(
+                    url,
+                    data=encoded,
+                    headers={'Content-type': 'application/x-www-form-urlencoded; charset=utf-8'},
+                    timeout=self.transport.timeout
+                )
+        except requests.RequestException as e:
+            self._release(replica, handler, failed=True)
+            raise SolrUnavailable(f"Failed to reach Solr at {url}: {e}")
+
+        elapsed = time.monotonic() - started
+        if resp.status_code >= 500:
+            self._release(replica, handler, failed=True)
+            raise SolrUnavailable(f"Solr responded with an error (HTTP {resp.status_code}): {resp.text[:200]}")
+        self._release(replica, handler, elapsed)
+        if resp.status_code != 200:
+            raise pysolr.SolrError(f"Solr responded with an error (HTTP {resp.status_code}): {resp.text[:200]}")
+
+        self.latency.record(elapsed)
+        return resp.content
+
+    def _release(self, replica, handler: str, seconds: Optional[float] = None, failed: bool = False) -> None:
+        """Report a request's outcome to the replica set."""
+        if handler == 'admin/luke':
+            # Sticky requests were never counted as in flight
+            if failed:
+                self.replicas.record_failure(replica)
+            else:
+                self.replicas.record_success(replica)
+        else:
+            self.replicas.release(replica, seconds, failed)
+
+    def _ping(self, url: str) -> bool:
+        """Health check used to re-admit an ejected replica."""
+        resp = self.transport.session.get(f'{url}/admin/ping', params={'wt': 'json'}, timeout=self.transport.timeout)
+        return resp.status_code == 200 and resp.json().get('status') == 'OK'
+
+    def _execute(self, params: Dict[str, Any], handler: str = 'select', cached: bool = True) -> Any:
+        """
+        Run a Solr query through the result cache.
+
+        Args:
+            params: Solr request parameters
+            handler: Request handler to send them to
+            cached: Whether the response may be served from or stored in the cache
+
+        Returns:
+            Results decoded from a fresh copy of the response
+        """
+        key = make_key(handler, params)
+        version = None
+        use_cache = cached and self.cache is not None
+        if use_cache:
+            version = self.index_version()
+            payload = self.cache.get(key, version)
+            if payload is not None:
+                return self._decode(payload, cached=True)
+
+        if self.flights is not None:
+            # Identical requests already in flight share that response
+            payload = self.flights.do(key, lambda: self._request(params, handler))
+        else:
+            payload = self._request(params, handler)
+
+        results = self._decode(payload)
+        # Partial results (timeAllowed hit) must not stand in for full ones
+        if use_cache and not self._is_partial(results):
+            self.cache.set(key, payload, version)
+        return results
+
+    def index_version(self) -> Optional[int]:
+        """
+        Get the current Lucene index version of the collection.
+
+        The value is looked up at most once per version_check_interval, so
+        callers can use it on every request to detect reindexing.
+
+        Returns:
+            Index version, or None if Solr cannot be reached
+        """
+        now = time.monotonic()
+        if now - self._version_checked < self.version_check_interval:
+            return self._index_version
+
+        with self._version_lock:
+            if now - self._version_checked < self.version_check_interval:
+                return self._index_version
+            try:
+                info = json.loads(self._request({'numTerms': 0, 'show': 'index'}, handler='admin/luke'))
+                self._index_version = info.get('index', {}).get('version')
+            except (pysolr.SolrError, ValueError) as e:
+                print(f"Index version check error: {e}")
+            self._version_checked = now
+        return self._index_version
+    
+    def search(
+        self,
+        query: str = '*:*',
+        filters: Optional[Dict[str, Any]] = None,
+        facets: Optional[List[str]] = None,
+        sort: Optional[str] = None,
+        start: int = 0,
+        rows: int = 10,
+        highlight: bool = False,
+        cursor_mark: Optional[str] = None,
+        profile: Optional[str] = None
+    ) -> Dict:
+        """
+        Perform a search query on Solr.
+
+        Pass cursor_mark='*' (then the returned 'next_cursor_mark') instead
+        of a growing start offset to page deeply at constant cost.
+
+        profile selects a named field list from FIELD_PROFILES instead of
+        the full default one.
+
+        The request passes through the query guard first (see QueryGuard):
+        expensive syntax is rewritten, rows/start are capped (then
+        'capped' is True and the docs aren't the page asked for) and Solr
+        may stop at timeAllowed, in which case 'partial' is True.
+
+        Facet counts are stored per (query, filters) independently of the
+        page window, so once one page of a query has been faceted, other
+        pages are requested with facet=false and reuse the stored counts.
+        """
+        requested = self._search_params(query, filters, facets, sort, start, rows, highlight, cursor_mark, profile)
+        params = self._admit(requested)
+        capped = any(int(params.get(name, 0)) != int(requested.get(name, 0)) for name in ('start', 'rows'))
+
+        try:
+            with self._timed('search'):
+                facet_key = None
+                stored_facets = None
+                if facets and self.facet_cache is not None:
+                    facet_key = self._facet_key(params)
+                    version = self.index_version()
+                    payload = self.facet_cache.get(facet_key, version)
+                    if payload is not None:
+                        stored_facets = loads(payload)
+                        params = {name: value for name, value in params.items() if not name.startswith('facet')}
+                        params['facet'] = 'false'
+
+                # Execute search
+                response = self._parse_search(self._execute(params))
+                if stored_facets is not None:
+                    response['facets'] = stored_facets
+                elif facet_key is not None and not response['partial']:
+                    self.facet_cache.set(facet_key, json.dumps(response['facets']).encode('utf-8'), version)
+                response['capped'] = capped
+                return response
         except Exception as e:
             print(f"Solr search error: {e}")
-            return {'docs': [], 'num_found': 0, 'facets': {}}
+            return {'docs': [], 'num_found': 0, 'facets': {}, 'error': str(e)}
+
+    def batch_search(
+        self,
+        queries: List[Dict[str, Any]],
+        concurrency: int = 8,
+        deadline: Optional[float] = None
+    ) -> List[Dict]:
+        """
+        Run many independent searches concurrently over the connection pool.
+
+        Args:
+            queries: Search specs, each a dict of search() keyword arguments
+            concurrency: Maximum number of searches in flight at once
+            deadline: Seconds the whole batch may take; searches still
+                running after that are reported as errors
+
+        Returns:
+            One result per spec, in input order. Failed searches return an
+            empty result with an 'error' message instead of failing the batch.
+        """
+        if not queries:
+            return []
+
+        def run(spec: Dict[str, Any]) -> Dict:
+            with self._timed('search'):
+                return self._parse_search(self._execute(self._admit(self._search_params(**spec))))
+
+        executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(queries))))
+        try:
+            futures = [executor.submit(run, spec) for spec in queries]
+            wait(futures, timeout=deadline)
+
+            results = []
+            for future in futures:
+                if not future.done():
+                    future.cancel()
+                    error = 'Batch deadline exceeded'
+                elif future.exception() is not None:
+                    error = str(future.exception())
+                else:
+                    results.append(future.result())
+                    continue
+                results.append({'docs': [], 'num_found': 0, 'facets': {}, 'error': error})
+            return results
+        finally:
+            # Don't wait for searches that overran the deadline
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def iter_documents(
+        self,
+        query: str = '*:*',
+        filters: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None,
+        sort: Optional[str] = None,
+        batch_size: int = 500,
+        use_export: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream every matching document in constant memory.
+
+        Documents are fetched batch by batch with cursorMark, or with one
+        streamed /export request when use_export is set (all fields and
+        the sort must then have docValues, so text fields like title and
+        plot cannot be exported). Results bypass the result cache.
+
+        Args:
+            query: Search query
+            filters: Filter dict as accepted by search()
+            fields: Fields to return (default: the search result fields)
+            sort: Sort order (default: id asc)
+            batch_size: Documents fetched per request with cursorMark
+            use_export: Use the /export handler instead of cursorMark
+
+        Yields:
+            Matching documents
+
+        Raises:
+            pysolr.SolrError: If Solr fails part-way through the stream
+        """
+        params = self._admit(self._search_params(query, filters, sort=sort or 'id asc', cursor_mark='*'))
+        # Bulk reads page through everything; only the query is guarded
+        params['rows'] = batch_size
+        if fields:
+            params['fl'] = ','.join(fields)
+
+        if use_export:
+            del params['cursorMark'], params['start'], params['rows']
+            params.pop('timeAllowed', None)
+            yield from self._iter_export(params)
+            return
+
+        while True:
+            results = self._execute(params, cached=False)
+            yield from results.docs
+            next_mark = results.nextCursorMark
+            if not results.docs or next_mark is None or next_mark == params['cursorMark']:
+                return
+            params['cursorMark'] = next_mark
+
+    def _iter_export(self, params: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Incrementally decode the docs array of a streamed /export response."""
+        params = dict(params, wt='json')
+        replica = self.replicas.acquire()
+        url = f'{replica.url}/export'
+        try:
+            resp = self.transport.session.get(url, params=params, stream=True, timeout=self.transport.timeout)
+        except requests.RequestException as e:
+            self.replicas.release(replica, failed=True)
+            raise SolrUnavailable(f"Failed to reach Solr at {url}: {e}")
+        # The stream's duration says nothing about the replica's latency
+        self.replicas.release(replica)
+
+        with resp:
+            if resp.status_code != 200:
+                raise pysolr.SolrError(f"Solr responded with an error (HTTP {resp.status_code}): {resp.text[:200]}")
+
+            decoder = json.JSONDecoder()
+            text = codecs.getincrementaldecoder('utf-8')()
+            buffer = ''
+            in_docs = False
+            for chunk in resp.iter_content(chunk_size=64 * 1024):
+                buffer += text.decode(chunk)
+                if not in_docs:
+                    marker = re.search(r'"docs"\s*:\s*\[', buffer)
+                    if marker is None:
+                        continue
+                    buffer = buffer[marker.end():]
+                    in_docs = True
+
+                pos = 0
+                while True:
+                    while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                        pos += 1
+                    if pos < len(buffer) and buffer[pos] == ']':
+                        return
+                    try:
+                        doc, pos = decoder.raw_decode(buffer, pos)
+                    except ValueError:
+                        # Document continues in the next chunk
+                        break
+                    yield doc
+                buffer = buffer[pos:]
+
+    def search_page(
+        self,
+        query: str = '*:*',
+        filters: Optional[Dict[str, Any]] = None,
+        facets: Optional[List[str]] = None,
+        sort: Optional[str] = None,
+        start: int = 0,
+        rows: int = 10,
+        highlight: bool = False,
+        cursor_mark: Optional[str] = None,
+        profile: Optional[str] = None,
+        window: int = 50,
+        prefetch: bool = False
+    ) -> Dict:
+        """
+        Get one page of results, fetching a whole window of pages at once.
+
+        The window containing the page (e.g. rows 0-49 for window=50) is
+        fetched in one request and kept in memory, so the following pages
+        of the same search are served without calling Solr.
+
+        Args:
+            window: Rows fetched per request; should be a multiple of rows
+            prefetch: When serving the first page of a window, fetch the
+                next window in the background
+            cursor_mark: cursorMark pointing at the start of the window.
+                Windows fetched with a caller's cursor are never cached,
+                since the cursor can't be checked against the window it
+                claims to start. Without one, the cursor is taken from
+                the cached previous window (see _get_window).
+
+        Other arguments are as for search().
+
+        Returns:
+            Same shape as search(), without 'next_cursor_mark'
+        """
+        window_start = start - start % window
+        if self.window_cache is None or rows > window or start + rows > window_start + window:
+            return self.search(query, filters, facets, sort, start, rows, highlight, cursor_mark, profile)
+
+        spec = {
+            'query': query, 'filters': filters, 'facets': facets, 'sort': sort,
+            'highlight': highlight, 'profile': profile, 'window': window
+        }
+        trusted = cursor_mark is None or start != window_start
+        if trusted:
+            result = self._get_window(spec, window_start)
+        else:
+            result = self.search(query, filters, facets, sort, window_start, window, highlight, cursor_mark, profile)
+
+        offset = start - window_start
+        page = dict(result)
+        page['docs'] = result['docs'][offset:offset + rows]
+        page.pop('next_cursor_mark', None)
+
+        if prefetch and trusted and offset == 0 and window_start + window < result['num_found']:
+            self._prefetch_window(spec, window_start + window)
+
+        return page
+
+    def _window_key(self, spec: Dict[str, Any], window_start: int) -> str:
+        params = self._search_params(
+            spec['query'], spec['filters'], spec['facets'], spec['sort'],
+            window_start, spec['window'], spec['highlight'], None, spec['profile']
+        )
+        return make_key('window', params)
+
+    def _get_window(self, spec: Dict[str, Any], window_start: int) -> Dict:
+        """
+        Return a cached result window, fetching and storing it on a miss.
+
+        Cursors never come from outside: a window is fetched with the
+        nextCursorMark stored in the cached previous window of the same
+        search (same index version), and by offset if there is none.
+        """
+        key = self._window_key(spec, window_start)
+        version = self.index_version()
+        payload = self.window_cache.get(key, version)
+        if payload is not None:
+            return loads(payload)
+
+        window = spec['window']
+        cursor_mark = None
+        if window_start >= window:
+            previous = self.window_cache.peek(self._window_key(spec, window_start - window), version)
+            if previous is not None:
+                cursor_mark = loads(previous).get('next_cursor_mark')
 
-    def get_movie(self, movie_id: str) -> Dict[str, Any]:
+        max_rows = self.guard.max_rows if self.guard is not None else 2 * window
+        if cursor_mark is None and window_start == window and 2 * window <= max_rows:
+            # The first window is fetched without a cursor so it is bounded
+            # by timeAllowed (Solr refuses both together). Paging past it
+            # starts the cursor chain: '*' with both windows' rows costs
+            # Solr the same as start=window, and its nextCursorMark leads
+            # on to the third window.
+            result = self.search(
+                spec['query'], spec['filters'], spec['facets'], spec['sort'],
+                0, 2 * window, spec['highlight'], '*', spec['profile']
+            )
+            result['docs'] = result['docs'][window:]
+        else:
+            result = self.search(
+                spec['query'], spec['filters'], spec['facets'], spec['sort'],
+                window_start, window, spec['highlight'], cursor_mark, spec['profile']
+            )
+        # Failed, partial or capped searches don't hold the window asked
+        # for; don't pin them in memory
+        if (result.get('num_found') or result.get('docs')) and not result.get('partial') and not result.get('capped'):
+            self.window_cache.set(key, json.dumps(result).encode('utf-8'), version)
+        return result
+
+    def _prefetch_window(self, spec: Dict[str, Any], window_start: int) -> None:
+        """Fetch a window in the background unless it is already cached."""
+        key = self._window_key(spec, window_start)
+        if self.window_cache.get(key, self.index_version()) is not None:
+            return
+        if self._prefetch_pool is None:
+            self._prefetch_pool = ThreadPoolExecutor(max_workers=2)
+        self.prefetches += 1
+        self._prefetch_pool.submit(self._get_window, spec, window_start)
+
+    def get_movie(
+        self,
+        movie_id: str,
+        rows: int = 5,
+        profile: str = 'detail',
+        similar_profile: str = 'strip'
+    ) -> Dict[str, Any]:
         """
         Fetch a single movie by ID, including similar movies (More Like This).
+
+        With the same profile for both, they come back from a single Solr
+        request. Otherwise (MLT neighbours are returned with the main
+        query's field list) the neighbours are fetched by a second request
+        sent in parallel, so they don't carry the movie's full text.
         
         Args:
             movie_id: The Solr ID of the movie.
+            rows: Number of similar movies to return.
+            profile: Field profile for the movie.
+            similar_profile: Field profile for its neighbours.
             
         Returns:
             Dictionary containing 'doc' (movie details) and 'similar' (list of similar movies).
         """
         try:
-            # We use the standard search handler but enable MLT
-            params = {
-                'q': f'id:"{movie_id}"',
-                'rows': 1,
-                'fl': '*,score',  # Fetch all fields
-                'mlt': 'true',
-                'mlt.fl': 'title,plot,reviews,genres,directors,cast',
-                'mlt.mindf': 1,
-                'mlt.mintf': 1,
-                'mlt.count': 5,
-                'mlt.boost': 'true',
-            }
-            
-            results = self.solr.search(**params)
-            
-            if not results.docs:
-                return None
-                
-            doc = results.docs[0]
-            
-            # Extract MLT results
-            # pysolr puts mlt results in results.moreLikeThis[movie_id]['docs']
-            similar = []
-            if hasattr(results, 'moreLikeThis') and movie_id in results.moreLikeThis:
-                similar = results.moreLikeThis[movie_id]['docs']
-                
-            return {
-                'doc': doc,
-                'similar': similar
-            }
-            
+            with self._timed('get_movie'):
+                if similar_profile == profile:
+                    return self._parse_movie(self._execute(self._movie_params(movie_id, rows, profile)), movie_id)
+
+                if self._movie_pool is None:
+                    self._movie_pool = ThreadPoolExecutor(max_workers=self.transport.pool_size)
+                # Run in a copy of this context so the response is counted
+                # in this get_movie call's metrics
+                neighbours = self._movie_pool.submit(
+                    contextvars.copy_context().run,
+                    self._execute, self._neighbour_params(movie_id, rows, similar_profile)
+                )
+                results = self._execute(self._doc_params(movie_id, profile))
+                return self._parse_movie(results, movie_id, neighbours.result())
         except Exception as e:
             print(f"Error fetching movie {movie_id}: {e}")
             return None
@@ -161,29 +1017,31 @@ class SolrClient:
     def get_facet_values(self, field: str, limit: int = 20) -> List[Dict[str, Any]]:
         """Get available values for a facet field."""
         try:
-            params = {
-                'q': '*:*',
-                'rows': 0,
-                'facet': 'true',
-                'facet.field': field,
-                'facet.limit': limit,
-                'facet.mincount': 1
-            }
-            
-            results = self.solr.search(**params)
-            
-            if hasattr(results, 'facets') and 'facet_fields' in results.facets:
-                # pysolr returns facets as a flat list [val1, count1, val2, count2...]
-                # We convert it to [{'value': val, 'count': count}, ...]
-                flat_list = results.facets['facet_fields'].get(field, [])
-                return [{'value': val, 'count': count} for val, count in zip(flat_list[0::2], flat_list[1::2])]
-            
-            return []
-            
+            with self._timed('get_facet_values'):
+                results = self._execute(self._facet_values_params(field, limit))
+                return self._parse_facet_values(results, field)
         except Exception as e:
             print(f"Error fetching facets for {field}: {e}")
             return []
     
+    def get_json_facets(self, limits: Dict[str, int]) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """
+        Get global value counts for several fields in one JSON Facet API request.
+
+        Args:
+            limits: Maximum number of values per field (-1 for all)
+
+        Returns:
+            Dictionary mapping field to value/count dicts, or None on error
+        """
+        try:
+            with self._timed('get_json_facets'):
+                results = self._execute(self._json_facet_params(limits), cached=False)
+                return self._parse_json_facets(results, list(limits))
+        except Exception as e:
+            print(f"Error fetching JSON facets: {e}")
+            return None
+
     def more_like_this(
         self,
         doc_id: str,
@@ -201,47 +1059,11 @@ class SolrClient:
         Returns:
             Dictionary with similar movies
         """
-        if mlt_fields is None:
-            # Use fields that actually exist in our data
-            mlt_fields = ['plot', 'title', 'genres', 'cast', 'directors', 'reviews']
-        
-        params = {
-            'q': f'id:{doc_id}',
-            'mlt': 'true',
-            'mlt.fl': ','.join(mlt_fields),
-            'mlt.mindf': 1,
-            'mlt.mintf': 1,
-            'mlt.count': rows,
-            'mlt.interestingTerms': 'details',
-            'fl': 'id,title,year,rating,genres,directors,cast,plot,url,site,poster',
-        }
-        
+        params = self._mlt_params(doc_id, mlt_fields, rows)
+
         try:
-            results = self.solr.search(**params)
-            
-            # Extract MLT results
-            similar_docs = []
-            
-            # Check raw_response for moreLikeThis as pysolr might not parse it
-            if hasattr(results, 'raw_response') and 'moreLikeThis' in results.raw_response:
-                mlt_data = results.raw_response['moreLikeThis'].get(doc_id, {})
-                if isinstance(mlt_data, dict):
-                    similar_docs = mlt_data.get('docs', [])
-                else:
-                    similar_docs = list(mlt_data)
-            elif hasattr(results, 'moreLikeThis') and results.moreLikeThis:
-                mlt_data = results.moreLikeThis.get(doc_id, {})
-                if isinstance(mlt_data, dict):
-                    similar_docs = mlt_data.get('docs', [])
-                else:
-                    similar_docs = list(mlt_data)
-            
-            return {
-                'docs': similar_docs,
-                'num_found': len(similar_docs),
-                'source_id': doc_id
-            }
-            
+            with self._timed('more_like_this'):
+                return self._parse_mlt(self._execute(params), doc_id)
         except Exception as e:
             print(f"MoreLikeThis error: {e}")
             return {
@@ -261,41 +1083,12 @@ class SolrClient:
             Movie document or None if not found
         """
         try:
-            results = self.solr.search(q=f'id:{doc_id}', rows=1)
-            if results.docs:
-                return results.docs[0]
-            return None
+            with self._timed('get_by_id'):
+                return self._parse_by_id(self._execute(self._by_id_params(doc_id)))
         except Exception as e:
             print(f"Get by ID error: {e}")
             return None
     
-    def _parse_facets(self, facet_data: Dict) -> Dict:
-        """
-        Parse facet data from Solr response.
-        
-        Args:
-            facet_data: Raw facet data from Solr
-            
-        Returns:
-            Parsed facet dictionary
-        """
-        if not facet_data or 'facet_fields' not in facet_data:
-            return {}
-        
-        parsed_facets = {}
-        for field, values in facet_data['facet_fields'].items():
-            # Solr returns facets as [value1, count1, value2, count2, ...]
-            facet_list = []
-            for i in range(0, len(values), 2):
-                if i + 1 < len(values):
-                    facet_list.append({
-                        'value': values[i],
-                        'count': values[i + 1]
-                    })
-            parsed_facets[field] = facet_list
-        
-        return parsed_facets
-    
     def stats(self) -> Dict:
         """
         Get collection statistics.
@@ -304,14 +1097,129 @@ class SolrClient:
             Dictionary with collection stats
         """
         try:
-            results = self.solr.search(q='*:*', rows=0)
-            return {
-                'total_docs': results.hits,
-                'status': 'ok'
-            }
+            # Bypass the cache so this doubles as a health check
+            with self._timed('stats'):
+                return self._parse_stats(self._execute(self._stats_params(), cached=False))
         except Exception as e:
             return {
                 'total_docs': 0,
                 'status': 'error',
                 'error': str(e)
             }
+
+    def writer(self, **kwargs) -> SolrWriter:
+        """
+        Create a batching writer for the same collection.
+
+        The writer gets its own connection pool so bulk updates never
+        compete with search traffic.
+
+        Args:
+            **kwargs: Options passed through to SolrWriter
+
+        Returns:
+            SolrWriter instance
+        """
+        return SolrWriter(self.solr_url, **kwargs)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Get result cache counters.
+
+        Returns:
+            Dictionary with hit/miss counts and memory usage
+        """
+        if self.cache is None:
+            return {'enabled': False}
+        return dict(self.cache.stats(), enabled=True)
+
+    def window_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get counters for result windows served by search_page().
+
+        Returns:
+            Dictionary with hit/miss counts, memory usage and prefetches
+        """
+        if self.window_cache is None:
+            return {'enabled': False}
+        return dict(self.window_cache.stats(), enabled=True, prefetches=self.prefetches)
+
+    def facet_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get counters for facet counts reused across pages.
+
+        Returns:
+            Dictionary with hit/miss counts and memory usage
+        """
+        if self.facet_cache is None:
+            return {'enabled': False}
+        return dict(self.facet_cache.stats(), enabled=True)
+
+    def guard_stats(self) -> Dict[str, Any]:
+        """
+        Get query admission counters.
+
+        Returns:
+            Dictionary with admitted, rewritten, simplified and capped searches
+        """
+        if self.guard is None:
+            return {'enabled': False}
+        return dict(self.guard.stats(), enabled=True)
+
+    def call_stats(self) -> Dict[str, Any]:
+        """
+        Get per-method call histograms.
+
+        Returns:
+            Dictionary mapping method name to wall time, QTime, parse time
+            and response size histograms (see CallMetrics)
+        """
+        return self.metrics.stats()
+
+    def routing_stats(self) -> Dict[str, Any]:
+        """
+        Get read routing state.
+
+        Returns:
+            Dictionary with the routing strategy and per-replica counters
+        """
+        return self.replicas.stats()
+
+    def breaker_stats(self) -> Dict[str, Any]:
+        """
+        Get circuit breaker, retry and hedging state.
+
+        Returns:
+            Dictionary with breaker state, retry budget and hedge counters
+        """
+        p95 = self.latency.percentile(95)
+        return {
+            'breaker': self.breaker.stats(),
+            'retry_budget': self.retry_budget.stats(),
+            'hedging': {
+                'enabled': self.hedge,
+                'p95_ms': round(p95 * 1000, 1) if p95 is not None else None,
+                'sent': self.hedges_sent,
+                'won': self.hedges_won
+            }
+        }
+
+    def coalesce_stats(self) -> Dict[str, Any]:
+        """
+        Get request coalescing counters.
+
+        Returns:
+            Dictionary with executed and saved Solr calls
+        """
+        if self.flights is None:
+            return {'enabled': False}
+        return dict(self.flights.stats(), enabled=True)
+
+    def pool_stats(self) -> Dict[str, int]:
+        """
+        Get live HTTP connection pool counters.
+
+        Returns:
+            Dictionary with in-use, idle and waiting connection counts
+        """
+        return self.transport.stats()
@@ -0,0 +1,121 @@
+"""
+Canonical filter query (fq) builder.
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Range fields and the grid their bounds are snapped to. Bounds are
+# moved inwards (min up, max down) to the grid, which matches the
+# precision of the stored values, so the result set never grows: no
+# stored value lies between a bound and its snapped value.
+RANGE_GRID = {
+    'year': 1,
+    'rating': 0.1,
+    'tomatometer': 1,
+}
+
+# Bounds at or beyond these limits are open ('*'), so "rating >= 7" and
+# "rating between 7 and 10" share one filterCache entry
+RANGE_LIMITS = {
+    'year': (1870, 2030),
+    'rating': (0.0, 10.0),
+    'tomatometer': (0, 100),
+}
+
+
+def _escape(value: Any) -> str:
+    """Quote a term value for use in a field query."""
+    text = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{text}"'
+
+
+def _format_number(value: float, step: float) -> str:
+    decimals = max(0, -int(math.floor(math.log10(step)))) if step < 1 else 0
+    return f'{value:.{decimals}f}'
+
+
+def _snap_range(field: str, low: Optional[float], high: Optional[float]) -> Tuple[str, str]:
+    """Snap range bounds to the field's grid and open them at its limits."""
+    step = RANGE_GRID.get(field)
+    limits = RANGE_LIMITS.get(field, (None, None))
+
+    def bound(value, direction, limit):
+        if value is None or value == '*' or value == '':
+            return '*'
+        value = float(value)
+        if limit is not None and (value <= limit if direction < 0 else value >= limit):
+            return '*'
+        if step is None:
+            return str(value)
+        # Round half-way noise (e.g. 7.000001) before snapping inwards
+        units = round(value / step, 6)
+        units = math.ceil(units) if direction < 0 else math.floor(units)
+        return _format_number(units * step, step)
+
+    return bound(low, -1, limits[0]), bound(high, 1, limits[1])
+
+
+def build_filter_queries(filters: Optional[Dict[str, Any]], tag: bool = True) -> List[str]:
+    """
+    Build canonical fq clauses from a filter dict.
+
+    Clauses come out sorted by field, multi-valued filters are
+    deduplicated and sorted, and range bounds are snapped, so the same
+    logical filter always produces the same strings (and so the same
+    Solr filterCache entries).
+
+    Args:
+        filters: Field -> value (term), list (OR of terms) or 2-tuple (range)
+        tag: Prefix each clause with {!tag=<field>} so facets can exclude
+            it for multi-select faceting
+
+    Returns:
+        List of fq strings
+    """
+    fq_list = []
+    for field in sorted(filters or {}):
+        value = filters[field]
+        if isinstance(value, (list, set)):
+            terms = sorted({str(v) for v in value if v not in (None, '')})
+            if not terms:
+                continue
+            clause = ' OR '.join(f'{field}:{_escape(v)}' for v in terms)
+            clause = f'({clause})' if len(terms) > 1 else clause
+        elif isinstance(value, tuple) and len(value) == 2:
+            if all(bound in (None, '*', '') for bound in value):
+                continue
+            # Bounds opened at the limits still exclude docs without a value
+            low, high = _snap_range(field, value[0], value[1])
+            clause = f'{field}:[{low} TO {high}]'
+        elif value in (None, ''):
+            continue
+        else:
+            clause = f'{field}:{_escape(value)}'
+
+        fq_list.append(f'{{!tag={field}}}{clause}' if tag else clause)
+    return fq_list
+
+
+def facet_fields(fields: List[str], filters: Optional[Dict[str, Any]], multi_select: bool = True) -> List[str]:
+    """
+    Build facet.field values, excluding each field's own filter when multi-selecting.
+
+    With multi_select, a field that is filtered gets {!ex=<field>}, so its
+    counts are computed as if that filter were absent (the other values
+    stay selectable) while still honouring every other filter.
+
+    Args:
+        fields: Fields to facet on
+        filters: Filters applied to the search
+        multi_select: Exclude each field's own tagged filter
+
+    Returns:
+        List of facet.field strings
+    """
+    filtered = set(filters or {})
+    return [
+        f'{{!ex={field}}}{field}' if multi_select and field in filtered else field
+        for field in fields
+    ]
@@ -0,0 +1,262 @@
+"""
+Query admission: cost limits for user-supplied searches.
+"""
+
+import re
+import threading
+from typing import Any, Dict, List, Tuple
+
+
+# Characters with a meaning in the Lucene query syntax
+_SPECIAL = re.compile(r'([+\-!(){}\[\]^"~*?:\\/]|&&|\|\|)')
+
+# An escaped pair (kept as is) or an unescaped special character
+_ESCAPED_OR_SPECIAL = re.compile(r'(\\.)|([+\-!(){}\[\]^"~*?:\\/]|&&|\|\|)')
+
+# One clause of a user query: a quoted phrase (with optional slop) or a bare token
+_CLAUSE = re.compile(r'"[^"]*"(?:~\d+)?|\S+')
+
+# Prefix operators/brackets, optional field, term, closing brackets and boost
+_TERM = re.compile(r'^([+\-!(]*)((?:[A-Za-z_][\w.]*):)?(.*?)(\)*)((?:\^[\d.]+)?)$')
+
+_OPERATORS = {'AND', 'OR', 'NOT', 'TO', '&&', '||'}
+
+
+def escape(text: str) -> str:
+    """Escape every Lucene special character so text is matched literally."""
+    return _SPECIAL.sub(r'\\\1', text)
+
+
+def _escape_term(term: str) -> str:
+    """Escape the special characters of a term that aren't escaped already."""
+    return _ESCAPED_OR_SPECIAL.sub(lambda m: m.group(1) or '\\' + m.group(2), term)
+
+
+def _unescaped(term: str) -> str:
+    """The term with escaped pairs removed, for spotting syntax in it."""
+    return re.sub(r'\\.', '', term)
+
+
+def prefix_query(field: str, prefix: str, min_prefix: int = 2) -> str:
+    """
+    Build a cheap prefix match for type-ahead.
+
+    Every word of the prefix is required and only the last one is
+    expanded as a prefix (and only once it is min_prefix characters
+    long), so no input can turn into a leading or bare wildcard.
+
+    Args:
+        field: Field to match
+        prefix: Raw user input
+        min_prefix: Shortest last word that is expanded with '*'
+
+    Returns:
+        Lucene query string, or '' if the prefix has no words
+    """
+    words = prefix.split()
+    if not words:
+        return ''
+    clauses = [f'+{field}:{escape(word)}' for word in words[:-1]]
+    last = escape(words[-1])
+    clauses.append(f'+{field}:{last}*' if len(words[-1]) >= min_prefix else f'+{field}:{last}')
+    return ' '.join(clauses)
+
+
+class QueryGuard:
+    """
+    Admission layer for search requests built from user input.
+
+    Before a search goes to Solr its cost is estimated from the query
+    syntax and the requested page. Expensive constructs are rewritten
+    (leading wildcards stripped, regexes and local params escaped, fuzzy
+    and proximity distances clamped), queries that are still too costly
+    are reduced to plain escaped terms, rows and start are capped, and
+    Solr's timeAllowed is set so a slow query returns partial results
+    (flagged in the response) instead of running until the read timeout.
+    """
+
+    # Estimated cost per clause type, relative to a plain term
+    COSTS = {
+        'term': 1,
+        'phrase': 2,
+        'prefix': 5,
+        'fuzzy': 10,
+        'range': 5,
+        'wildcard': 50,
+        'regex': 50,
+    }
+
+    def __init__(
+        self,
+        max_rows: int = 100,
+        max_start: int = 5000,
+        time_allowed: int = 2000,
+        max_cost: int = 100,
+        max_clauses: int = 32,
+        min_prefix: int = 2,
+        max_slop: int = 10
+    ):
+        """
+        Args:
+            max_rows: Largest page size sent to Solr
+            max_start: Largest start offset (deeper pages need cursorMark)
+            time_allowed: Milliseconds Solr may spend searching (0 disables)
+            max_cost: Estimated cost above which a query is reduced to plain terms
+            max_clauses: Clauses kept from a user query
+            min_prefix: Shortest term a trailing wildcard may expand
+            max_slop: Largest phrase slop kept
+        """
+        self.max_rows = max_rows
+        self.max_start = max_start
+        self.time_allowed = time_allowed
+        self.max_cost = max_cost
+        self.max_clauses = max_clauses
+        self.min_prefix = min_prefix
+        self.max_slop = max_slop
+        self.admitted = 0
+        self.rewritten = 0
+        self.simplified = 0
+        self.capped = 0
+        self._lock = threading.Lock()
+
+    def _rewrite_clause(self, clause: str) -> Tuple[str, int]:
+        """Rewrite one clause and return it with its estimated cost."""
+        if clause in _OPERATORS:
+            return clause, 0
+
+        if clause.startswith('"'):
+            phrase, _, slop = clause.partition('~')
+            if slop:
+                slop = min(int(slop), self.max_slop)
+                return f'{phrase}~{slop}', self.COSTS['phrase'] + slop
+            return clause, self.COSTS['phrase']
+
+        match = _TERM.match(clause)
+        lead, field, term, close, boost = match.groups() if match else ('', None, clause, '', '')
+        field = field or ''
+
+        # Local params ({!join ...}) and regexes (/.../) are never user syntax here
+        if term.startswith('{!') or (term.startswith('/') and len(term) > 1):
+            return f'{lead}{field}{escape(term)}{close}{boost}', self.COSTS['regex']
+
+        # Ranges are left to Solr; they are cheap on numeric fields
+        if term.startswith(('[', '{')) or term.endswith((']', '}')):
+            return clause, self.COSTS['range']
+
+        fuzzy = re.search(r'(?<!\\)~(\d*(?:\.\d+)?)$', term)
+        if fuzzy:
+            term = term[:fuzzy.start()]
+            stem = term.lstrip('*?')
+            if not stem:
+                return '', 0
+            # Edit distance 1 keeps the automaton small
+            return f'{lead}{field}{_escape_term(stem)}~1{close}{boost}', self.COSTS['fuzzy']
+
+        # Escaped characters (spider\-m\*, as built by prefix_query) are
+        # literal: they are neither wildcards nor escaped a second time
+        bare = _unescaped(term)
+        if '*' not in bare and '?' not in bare:
+            return clause, self.COSTS['term']
+
+        # Leading wildcards force a scan of the whole term dictionary
+        stem = term.lstrip('*?')
+        if not stem:
+            return '', 0
+
+        literal = re.sub(r'(?<!\\)\*+$', '', stem)
+        bare = _unescaped(literal)
+        if literal != stem and '*' not in bare and '?' not in bare:
+            # Very short prefixes expand to most of the dictionary
+            if len(bare) < self.min_prefix:
+                return f'{lead}{field}{_escape_term(literal)}{close}{boost}', self.COSTS['term']
+            return f'{lead}{field}{_escape_term(literal)}*{close}{boost}', self.COSTS['prefix']
+        if '*' not in _unescaped(stem) and '?' not in _unescaped(stem):
+            return f'{lead}{field}{stem}{close}{boost}', self.COSTS['term']
+
+        # Infix wildcards (f*o?o) are kept but counted as expensive
+        return f'{lead}{field}{stem}{close}{boost}', self.COSTS['wildcard']
+
+    def rewrite_query(self, query: str) -> Tuple[str, int, bool]:
+        """
+        Rewrite a user query into a bounded-cost form.
+
+        Args:
+            query: Raw query string
+
+        Returns:
+            Tuple of (rewritten query, estimated cost, whether it was
+            reduced to plain terms)
+        """
+        clauses = _CLAUSE.findall(query)[:self.max_clauses]
+        rewritten: List[str] = []
+        cost = 0
+        for clause in clauses:
+            text, clause_cost = self._rewrite_clause(clause)
+            if text:
+                rewritten.append(text)
+                cost += clause_cost
+
+        if cost > self.max_cost:
+            # Too expensive even after rewriting: match the words literally
+            words = [w for w in re.split(r'\s+', query) if w and w not in _OPERATORS][:self.max_clauses]
+            return ' '.join(escape(w) for w in words), len(words), True
+        return ' '.join(rewritten), cost, False
+
+    def admit(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Apply the admission rules to the parameters of a search.
+
+        Args:
+            params: Solr parameters built by SolrQueries._search_params
+
+        Returns:
+            Parameters safe to send (the input dict is not modified)
+        """
+        params = dict(params)
+        rewritten = simplified = capped = False
+
+        query = params.get('q')
+        if query and query != '*:*':
+            new_query, _, simplified = self.rewrite_query(query)
+            rewritten = new_query != query
+            # An emptied query (e.g. only '*') becomes match-all
+            params['q'] = new_query or '*:*'
+            if not new_query:
+                params.pop('defType', None)
+
+        if int(params.get('rows', 0)) > self.max_rows:
+            params['rows'] = self.max_rows
+            capped = True
+        if int(params.get('start', 0)) > self.max_start:
+            params['start'] = self.max_start
+            capped = True
+
+        # Solr refuses timeAllowed together with cursorMark; cursor pages
+        # are bounded by rows and the read timeout instead
+        if self.time_allowed and 'cursorMark' not in params:
+            params['timeAllowed'] = self.time_allowed
+
+        with self._lock:
+            self.admitted += 1
+            self.rewritten += rewritten
+            self.simplified += simplified
+            self.capped += capped
+        return params
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get admission counters.
+
+        Returns:
+            Dictionary with admitted, rewritten, simplified and capped searches
+        """
+        with self._lock:
+            return {
+                'admitted': self.admitted,
+                'rewritten': self.rewritten,
+                'simplified': self.simplified,
+                'capped': self.capped,
+                'max_rows': self.max_rows,
+                'max_start': self.max_start,
+                'time_allowed_ms': self.time_allowed
+            }
@@ -0,0 +1,197 @@
+"""
+Per-method timing of Solr client calls.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+
+class Histogram:
+    """Fixed-bucket histogram (cumulative buckets, Prometheus style)."""
+
+    def __init__(self, buckets: Sequence[float]):
+        """
+        Args:
+            buckets: Upper bounds of the buckets, ascending; a final +Inf
+                bucket is implied
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add one sample (callers hold their own lock)."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile as the upper bound of the bucket containing it.
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            Bucket upper bound, the largest bound for samples past the
+            last bucket, or None without samples
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+    def cumulative(self) -> Iterator:
+        """Yield (upper bound, cumulative count) pairs, ending with +Inf."""
+        seen = 0
+        for bound, n in zip(self.buckets + (float('inf'),), self.counts):
+            seen += n
+            yield bound, seen
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summary with count, sum, mean, p50/p95/p99 and cumulative buckets."""
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 3),
+            'mean': round(self.sum / self.count, 3) if self.count else None,
+            'p50': self.quantile(0.50),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'buckets': {('+Inf' if bound == float('inf') else str(bound)): n for bound, n in self.cumulative()}
+        }
+
+
+class _CallRecord:
+    """What one client call spent, filled in by each Solr response it reads."""
+
+    __slots__ = ('bytes', 'parse', 'qtime', 'responses', 'cache_hits')
+
+    def __init__(self):
+        self.bytes = 0
+        self.parse = 0.0
+        self.qtime: Optional[int] = None
+        self.responses = 0
+        self.cache_hits = 0
+
+
+# The call being timed in this thread or asyncio task
+_current: ContextVar[Optional[_CallRecord]] = ContextVar('solr_call', default=None)
+
+
+class CallMetrics:
+    """
+    Histograms of client calls, grouped by method.
+
+    For every call: wall time, Solr's QTime, response size and the time
+    spent decoding the response on the client. QTime is only recorded for
+    responses that came from Solr (not from a cache); the gap between wall
+    time and QTime is network, queueing and client work.
+    """
+
+    # Milliseconds
+    TIME_BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+    # Bytes
+    SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+    def __init__(self):
+        self._methods: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _method(self, method: str) -> Dict[str, Any]:
+        entry = self._methods.get(method)
+        if entry is None:
+            entry = self._methods[method] = {
+                'calls': 0,
+                'errors': 0,
+                'cache_hits': 0,
+                'wall_ms': Histogram(self.TIME_BUCKETS),
+                'qtime_ms': Histogram(self.TIME_BUCKETS),
+                'parse_ms': Histogram(self.TIME_BUCKETS),
+                'bytes': Histogram(self.SIZE_BUCKETS),
+            }
+        return entry
+
+    @contextmanager
+    def call(self, method: str) -> Iterator[_CallRecord]:
+        """
+        Time one client call.
+
+        Responses decoded while the block runs (see response()) are
+        attributed to this call. An exception escaping the block counts
+        as an error.
+
+        Args:
+            method: Client method name, e.g. 'search'
+        """
+        record = _CallRecord()
+        token = _current.set(record)
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield record
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            wall = time.perf_counter() - started
+            _current.reset(token)
+            with self._lock:
+                entry = self._method(method)
+                entry['calls'] += 1
+                entry['errors'] += failed
+                entry['cache_hits'] += record.cache_hits
+                entry['wall_ms'].observe(wall * 1000)
+                if record.responses:
+                    entry['bytes'].observe(record.bytes)
+                    entry['parse_ms'].observe(record.parse * 1000)
+                if record.qtime is not None:
+                    entry['qtime_ms'].observe(record.qtime)
+
+    @staticmethod
+    def response(size: int, parse_seconds: float, qtime: Optional[int], cached: bool = False) -> None:
+        """
+        Attribute a decoded response to the call being timed, if any.
+
+        Args:
+            size: Response body size in bytes
+            parse_seconds: Time spent decoding it
+            qtime: Solr's reported QTime in milliseconds
+            cached: Whether the body came from a cache instead of Solr
+        """
+        record = _current.get()
+        if record is None:
+            return
+        record.responses += 1
+        record.bytes += size
+        record.parse += parse_seconds
+        if cached:
+            record.cache_hits += 1
+        elif qtime is not None:
+            record.qtime = (record.qtime or 0) + qtime
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get histograms per method.
+
+        Returns:
+            Dictionary mapping method name to call/error/cache-hit counts
+            and wall_ms, qtime_ms, parse_ms and bytes histogram summaries
+        """
+        with self._lock:
+            return {
+                method: {
+                    name: value.snapshot() if isinstance(value, Histogram) else value
+                    for name, value in entry.items()
+                }
+                for method, entry in self._methods.items()
+            }
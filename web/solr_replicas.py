@@ -0,0 +1,234 @@
+"""
+Read routing across Solr replicas: health checks, ejection and load balancing.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Replica:
+    """One Solr node serving the collection and its routing state."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip('/')
+        self.outstanding = 0
+        self.latency: Optional[float] = None  # moving average, seconds
+        self.failures = 0
+        self.ejected_at: Optional[float] = None
+        self.routed = 0
+        self.errors = 0
+        self.times_ejected = 0
+
+    @property
+    def ejected(self) -> bool:
+        return self.ejected_at is not None
+
+
+class ReplicaSet:
+    """
+    Pick which replica serves each read.
+
+    least_outstanding: the replica with the fewest requests in flight,
+    ties broken by recent latency.
+    latency: the replica with the lowest expected wait, i.e. recent
+    latency weighted by requests in flight.
+
+    A replica failing eject_after times in a row is taken out of rotation.
+    A health check pings ejected (and recently failing) replicas every
+    health_check_interval and puts them back once they answer. If every
+    replica is ejected, the one ejected longest ago is still tried rather
+    than failing every read.
+    """
+
+    LEAST_OUTSTANDING = 'least_outstanding'
+    LATENCY = 'latency'
+
+    def __init__(
+        self,
+        urls: List[str],
+        strategy: str = LEAST_OUTSTANDING,
+        eject_after: int = 3,
+        health_check_interval: float = 5.0,
+        decay: float = 0.2
+    ):
+        """
+        Args:
+            urls: Base URLs of the collection on each replica
+            strategy: LEAST_OUTSTANDING or LATENCY
+            eject_after: Consecutive failures that eject a replica
+            health_check_interval: Seconds between pings of failing replicas
+            decay: Weight of the newest sample in the latency moving average
+        """
+        if not urls:
+            raise ValueError('At least one Solr URL is required')
+        if strategy not in (self.LEAST_OUTSTANDING, self.LATENCY):
+            raise ValueError(f'Unknown routing strategy: {strategy}')
+        self.replicas = [Replica(url) for url in urls]
+        self.strategy = strategy
+        self.eject_after = eject_after
+        self.health_check_interval = health_check_interval
+        self.decay = decay
+        self._next = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self.replicas)
+
+    def _cost(self, replica: Replica) -> float:
+        # Unmeasured replicas look fast so they get sampled; each recent
+        # failure weighs like a request in flight (or a second of latency),
+        # so a retry moves to another replica before ejection kicks in
+        latency = replica.latency or 0.0
+        if self.strategy == self.LATENCY:
+            return (replica.outstanding + 1) * latency + replica.failures
+        return replica.outstanding + replica.failures + latency
+
+    def acquire(self) -> Replica:
+        """
+        Choose a replica for one request and count it as in flight.
+
+        Callers must hand it back with release().
+        """
+        with self._lock:
+            candidates = [r for r in self.replicas if not r.ejected]
+            if not candidates:
+                candidates = [min(self.replicas, key=lambda r: r.ejected_at)]
+
+            # Start the scan at a rotating offset so ties spread evenly
+            start = self._next % len(candidates)
+            self._next += 1
+            ordered = candidates[start:] + candidates[:start]
+            replica = min(ordered, key=self._cost)
+            replica.outstanding += 1
+            replica.routed += 1
+
+        logger.debug(
+            'Routing Solr read to %s (outstanding=%d, latency=%s)',
+            replica.url, replica.outstanding,
+            f'{replica.latency * 1000:.1f}ms' if replica.latency is not None else 'n/a'
+        )
+        return replica
+
+    def preferred(self) -> Replica:
+        """First replica in configured order that is in rotation (for requests that must be sticky)."""
+        with self._lock:
+            for replica in self.replicas:
+                if not replica.ejected:
+                    return replica
+            return self.replicas[0]
+
+    def release(self, replica: Replica, seconds: Optional[float] = None, failed: bool = False) -> None:
+        """
+        Record the outcome of a request sent to a replica.
+
+        Args:
+            replica: Replica returned by acquire()
+            seconds: Time the replica took to answer
+            failed: Whether the replica failed to answer
+        """
+        with self._lock:
+            replica.outstanding = max(0, replica.outstanding - 1)
+        if failed:
+            self.record_failure(replica)
+        else:
+            self.record_success(replica, seconds)
+
+    def abandon(self, replica: Replica) -> None:
+        """Hand back a replica whose request was cancelled, without judging its health."""
+        with self._lock:
+            replica.outstanding = max(0, replica.outstanding - 1)
+
+    def record_success(self, replica: Replica, seconds: Optional[float] = None) -> None:
+        """Record an answer from a replica, re-admitting it if it was ejected."""
+        with self._lock:
+            replica.failures = 0
+            if seconds is not None:
+                if replica.latency is None:
+                    replica.latency = seconds
+                else:
+                    replica.latency += self.decay * (seconds - replica.latency)
+            readmitted = replica.ejected
+            replica.ejected_at = None
+        if readmitted:
+            logger.info('Solr replica %s is answering again; back in rotation', replica.url)
+
+    def record_failure(self, replica: Replica) -> None:
+        """Record a failed request, ejecting the replica after repeated failures."""
+        with self._lock:
+            replica.failures += 1
+            replica.errors += 1
+            ejected = not replica.ejected and replica.failures >= self.eject_after
+            if ejected:
+                replica.ejected_at = time.monotonic()
+                replica.times_ejected += 1
+        if ejected:
+            logger.warning(
+                'Ejecting Solr replica %s after %d consecutive failures', replica.url, replica.failures
+            )
+
+    def check(self, ping: Callable[[str], bool]) -> None:
+        """
+        Ping every ejected or failing replica and clear those that answer.
+
+        Args:
+            ping: Function taking a replica URL and returning True if it is healthy
+        """
+        for replica in [r for r in self.replicas if r.ejected or r.failures]:
+            try:
+                healthy = ping(replica.url)
+            except Exception as e:
+                logger.debug('Health check of %s failed: %s', replica.url, e)
+                healthy = False
+            if healthy:
+                self.record_success(replica)
+
+    def start(self, ping: Callable[[str], bool]) -> None:
+        """Run check() every health_check_interval in a daemon thread."""
+        if self._thread is not None or self.health_check_interval <= 0:
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(self.health_check_interval):
+                self.check(ping)
+
+        self._thread = threading.Thread(target=loop, name='solr-health-check', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the health check thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get routing state per replica.
+
+        Returns:
+            Dictionary with the strategy and, per replica URL, requests
+            routed, in flight, errors, latency and ejection state
+        """
+        with self._lock:
+            return {
+                'strategy': self.strategy,
+                'in_rotation': sum(1 for r in self.replicas if not r.ejected),
+                'replicas': {
+                    r.url: {
+                        'routed': r.routed,
+                        'outstanding': r.outstanding,
+                        'errors': r.errors,
+                        'latency_ms': round(r.latency * 1000, 2) if r.latency is not None else None,
+                        'ejected': r.ejected,
+                        'times_ejected': r.times_ejected
+                    }
+                    for r in self.replicas
+                }
+            }
@@ -0,0 +1,184 @@
+"""
+Failure handling for Solr calls: circuit breaker, retry budget and latency tracking.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+import pysolr
+
+
+class SolrUnavailable(pysolr.SolrError):
+    """Solr could not answer (connection failure, timeout, 5xx or open breaker)."""
+
+
+class CircuitBreaker:
+    """
+    Stop calling Solr after repeated failures.
+
+    closed: calls go through and consecutive failures are counted.
+    open: calls fail immediately until reset_timeout has passed.
+    half_open: a single trial call is let through; success closes the
+    breaker, failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open the breaker
+            reset_timeout: Seconds to stay open before allowing a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Check whether a call may be sent now."""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    self.rejected += 1
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        """Record a call that Solr answered."""
+        with self._lock:
+            self.failures = 0
+            self.state = self.CLOSED
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a call that Solr failed to answer."""
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get breaker state.
+
+        Returns:
+            Dictionary with state, failure count and seconds until retry
+        """
+        with self._lock:
+            retry_in = 0.0
+            if self.state == self.OPEN:
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'failure_threshold': self.failure_threshold,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected,
+                'retry_in': round(retry_in, 3)
+            }
+
+
+class RetryBudget:
+    """
+    Cap retries to a fraction of overall traffic.
+
+    Every request deposits ``ratio`` tokens and every retry spends one, so
+    retries can never multiply load on a struggling Solr beyond
+    (1 + ratio) times the incoming request rate. ``min_tokens`` lets a
+    quiet client still retry occasionally.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_tokens: float = 10.0):
+        """
+        Args:
+            ratio: Retries allowed per request
+            min_tokens: Tokens available at start and cap on saved tokens
+        """
+        self.ratio = ratio
+        self.max_tokens = min_tokens
+        self.tokens = min_tokens
+        self.retries = 0
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        """Record a request."""
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Try to spend a token on a retry."""
+        with self._lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.retries += 1
+                return True
+            self.denied += 1
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Get retry budget counters."""
+        with self._lock:
+            return {
+                'tokens': round(self.tokens, 2),
+                'retries': self.retries,
+                'denied': self.denied
+            }
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies for percentile estimates."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        """
+        Args:
+            window: Number of recent latencies kept
+            min_samples: Samples needed before percentiles are reported
+        """
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Add one latency sample."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """
+        Estimate a latency percentile.
+
+        Args:
+            pct: Percentile between 0 and 100
+
+        Returns:
+            Latency in seconds, or None until enough samples are collected
+        """
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+        return ordered[index]
@@ -0,0 +1,74 @@
+"""
+Fast decoding of Solr JSON responses.
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # optional speed-up, stdlib json is used without it
+    orjson = None
+
+
+def loads(payload: bytes) -> Dict[str, Any]:
+    """
+    Decode a raw Solr JSON body.
+
+    Uses orjson when it is installed, which parses UTF-8 bytes directly
+    without first building an intermediate str.
+
+    Args:
+        payload: Response body as returned by Solr (wt=json)
+
+    Returns:
+        Decoded response dict
+    """
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+class SolrResponse:
+    """
+    Lightweight read-only view over a decoded Solr response.
+
+    Exposes the attributes of pysolr.Results that the client parsers read,
+    looked up lazily from the decoded dict, so nothing is copied and unused
+    sections (debug, spellcheck, stats, grouped) cost nothing.
+    """
+
+    __slots__ = ('raw_response',)
+
+    def __init__(self, decoded: Dict[str, Any]):
+        self.raw_response = decoded
+
+    @property
+    def docs(self) -> List[Dict[str, Any]]:
+        return (self.raw_response.get('response') or {}).get('docs', [])
+
+    @property
+    def hits(self) -> int:
+        return (self.raw_response.get('response') or {}).get('numFound', 0)
+
+    @property
+    def facets(self) -> Dict[str, Any]:
+        return self.raw_response.get('facet_counts', {})
+
+    @property
+    def highlighting(self) -> Dict[str, Any]:
+        return self.raw_response.get('highlighting', {})
+
+    @property
+    def nextCursorMark(self) -> Optional[str]:
+        return self.raw_response.get('nextCursorMark')
+
+    @property
+    def qtime(self) -> Optional[int]:
+        return self.raw_response.get('responseHeader', {}).get('QTime')
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def __iter__(self):
+        return iter(self.docs)
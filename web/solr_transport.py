@@ -0,0 +1,154 @@
+"""
+Pooled HTTP transport for Solr requests.
+"""
+
+import threading
+from typing import Dict, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class _MeteredAdapter(HTTPAdapter):
+    """HTTPAdapter that bounds in-flight requests per host and counts pool usage."""
+
+    def __init__(self, pool_size: int, hosts: int = 1, pool_block: bool = True, max_retries: int = 0):
+        self._pool_size = pool_size
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._gate = pool_block
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.waiting = 0
+        self.requests_sent = 0
+        # One urllib3 pool per host; with fewer pools than hosts, switching
+        # hosts evicts (and closes) another host's keep-alive connections
+        super().__init__(
+            pool_connections=max(1, hosts),
+            pool_maxsize=pool_size,
+            pool_block=pool_block,
+            max_retries=max_retries
+        )
+
+    def _host_slots(self, url: str) -> threading.BoundedSemaphore:
+        parts = urlsplit(url)
+        host = f'{parts.scheme}://{parts.netloc}'
+        with self._lock:
+            slots = self._slots.get(host)
+            if slots is None:
+                slots = self._slots[host] = threading.BoundedSemaphore(self._pool_size)
+            return slots
+
+    def send(self, request, **kwargs):
+        """Send a request, waiting for a free connection slot if the host's pool is full."""
+        slots = self._host_slots(request.url) if self._gate else None
+        if slots is not None:
+            with self._lock:
+                self.waiting += 1
+            slots.acquire()
+            with self._lock:
+                self.waiting -= 1
+
+        with self._lock:
+            self.in_use += 1
+            self.requests_sent += 1
+
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            if slots is not None:
+                slots.release()
+
+    def connection_counts(self) -> Tuple[int, int]:
+        """
+        Count connections held by the underlying urllib3 pools.
+
+        Returns:
+            Tuple of (idle connections, connections opened so far)
+        """
+        idle = 0
+        opened = 0
+        pools = self.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened += getattr(pool, 'num_connections', 0)
+            queue = getattr(pool, 'pool', None)
+            if queue is not None:
+                # urllib3 pre-fills the queue with None placeholders
+                idle += sum(1 for conn in list(queue.queue) if conn is not None)
+        return idle, opened
+
+
+class SolrTransport:
+    """
+    Keep-alive connection pool shared by every thread talking to Solr.
+
+    The underlying requests.Session is only used to send requests (no
+    per-request mutation of headers or cookies), so a single transport is
+    safe to share between Flask worker threads.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        hosts: int = 1,
+        keep_alive: bool = True,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        pool_block: bool = True,
+        max_retries: int = 0
+    ):
+        """
+        Args:
+            pool_size: Maximum number of pooled connections per Solr host
+            hosts: Number of Solr hosts (replicas) requests are spread over;
+                each keeps its own pool
+            keep_alive: Reuse connections between requests
+            connect_timeout: Seconds to wait for a TCP connection
+            read_timeout: Seconds to wait for Solr to send a response
+            pool_block: Make callers wait for a free connection instead of
+                opening throwaway connections beyond pool_size
+            max_retries: Connection-level retries performed by urllib3
+        """
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        self.adapter = _MeteredAdapter(pool_size, hosts=hosts, pool_block=pool_block, max_retries=max_retries)
+        self.session = requests.Session()
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """(connect, read) timeout tuple understood by requests."""
+        return (self.connect_timeout, self.read_timeout)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get live connection pool counters.
+
+        Returns:
+            Dictionary with the per-host pool size and in-use, idle and
+            waiting counts summed over hosts
+        """
+        idle, opened = self.adapter.connection_counts()
+        return {
+            'pool_size': self.pool_size,
+            'in_use': self.adapter.in_use,
+            'idle': idle,
+            'waiting': self.adapter.waiting,
+            'opened': opened,
+            'requests': self.adapter.requests_sent
+        }
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.session.close()
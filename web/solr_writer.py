@@ -0,0 +1,213 @@
+"""
+Batched write path for the Solr movies collection.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pysolr
+
+from solr_transport import SolrTransport
+
+
+class SolrWriter:
+    """
+    Buffers adds and deletes and sends them to Solr in batches.
+
+    Nothing written through the writer forces a hard commit. Buffered
+    operations are flushed when ``batch_size`` operations are waiting or
+    ``flush_interval`` seconds have passed since the oldest one, and become
+    visible through ``commitWithin`` (default) or a soft commit.
+    """
+
+    def __init__(
+        self,
+        solr_url: str = 'http://localhost:8983/solr/movies',
+        batch_size: int = 500,
+        flush_interval: Optional[float] = 1.0,
+        commit_within: Optional[int] = 5000,
+        pool_size: int = 2,
+        read_timeout: float = 60.0,
+        transport: Optional[SolrTransport] = None
+    ):
+        """
+        Args:
+            solr_url: Base URL of the movies collection
+            batch_size: Number of buffered operations that triggers a flush
+            flush_interval: Seconds after which buffered operations are
+                flushed in the background (None disables timed flushes)
+            commit_within: Milliseconds within which Solr must make flushed
+                changes visible; None sends a soft commit after every flush
+            pool_size: Connections kept for writes (separate from reads)
+            read_timeout: Seconds to wait for Solr to acknowledge a batch
+            transport: Existing transport to use instead of creating one
+        """
+        self.transport = transport or SolrTransport(pool_size=pool_size, read_timeout=read_timeout)
+        self.solr = pysolr.Solr(
+            solr_url,
+            always_commit=False,
+            timeout=self.transport.timeout,
+            session=self.transport.session
+        )
+        self.solr_url = solr_url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.commit_within = commit_within
+
+        self._pending: List[Tuple[str, Any]] = []
+        self._oldest: Optional[float] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+        self.stats = {'adds': 0, 'deletes': 0, 'flushes': 0, 'errors': 0}
+
+    def add(self, docs: Iterable[Dict[str, Any]]) -> None:
+        """Buffer documents to be added (or replaced) in the index."""
+        self._enqueue([('add', doc) for doc in docs])
+
+    def delete(self, id: Optional[Any] = None, q: Optional[str] = None) -> None:
+        """
+        Buffer a delete by ID (or list of IDs) or by query.
+
+        Args:
+            id: Document ID or list of IDs to delete
+            q: Lucene query selecting documents to delete
+        """
+        if (id is None) == (q is None):
+            raise ValueError('Specify exactly one of "id" or "q".')
+        if q is not None:
+            self._enqueue([('delete_query', q)])
+        else:
+            ids = id if isinstance(id, (list, set, tuple)) else [id]
+            self._enqueue([('delete_id', doc_id) for doc_id in ids])
+
+    def _enqueue(self, ops: List[Tuple[str, Any]]) -> None:
+        if not ops:
+            return
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.extend(ops)
+            full = len(self._pending) >= self.batch_size
+        self._ensure_flusher()
+        if full:
+            self.flush()
+
+    def _ensure_flusher(self) -> None:
+        if self.flush_interval is None or self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while not self._closed.wait(self.flush_interval):
+            with self._lock:
+                due = self._oldest is not None and time.monotonic() - self._oldest >= self.flush_interval
+            if due:
+                try:
+                    self.flush()
+                except pysolr.SolrError as e:
+                    print(f"Background Solr flush error: {e}")
+
+    def flush(self) -> int:
+        """
+        Send all buffered operations to Solr, preserving their order.
+
+        If Solr rejects a request, the operations not yet acknowledged are
+        put back at the front of the buffer, ahead of anything buffered
+        since, and the error is raised. They are sent again by the next
+        flush: the background flusher retries after flush_interval, and
+        explicit callers (flush, commit, close) may call again. Adds and
+        deletes are idempotent, so resending a partly applied batch is safe.
+
+        Returns:
+            Number of operations sent
+        """
+        with self._flush_lock:
+            with self._lock:
+                ops, self._pending = self._pending, []
+                self._oldest = None
+            if not ops:
+                return 0
+
+            sent = 0
+            try:
+                last_kind = None
+                for kind, values in self._group(ops):
+                    if kind == 'add':
+                        self.solr.add(values, commit=False, commitWithin=self.commit_within)
+                        self.stats['adds'] += len(values)
+                    elif kind == 'delete_id':
+                        self.solr.delete(id=values, commit=False)
+                        self.stats['deletes'] += len(values)
+                    else:
+                        for query in values:
+                            self.solr.delete(q=query, commit=False)
+                            self.stats['deletes'] += 1
+                            sent += 1
+                        last_kind = kind
+                        continue
+                    sent += len(values)
+                    last_kind = kind
+
+                # commitWithin only rides on adds, so trailing deletes (or
+                # soft-commit mode) need an explicit soft commit
+                if self.commit_within is None or last_kind != 'add':
+                    self.solr.commit(softCommit=True)
+            except pysolr.SolrError:
+                self.stats['errors'] += 1
+                if sent < len(ops):
+                    self._requeue(ops[sent:])
+                raise
+
+            self.stats['flushes'] += 1
+            return len(ops)
+
+    def _requeue(self, ops: List[Tuple[str, Any]]) -> None:
+        """Put unsent operations back ahead of those buffered meanwhile."""
+        with self._lock:
+            self._pending[:0] = ops
+            self._oldest = time.monotonic()
+
+    @staticmethod
+    def _group(ops: List[Tuple[str, Any]]) -> List[Tuple[str, List[Any]]]:
+        """Group consecutive operations of the same kind into one request each."""
+        groups: List[Tuple[str, List[Any]]] = []
+        for kind, value in ops:
+            if groups and groups[-1][0] == kind:
+                groups[-1][1].append(value)
+            else:
+                groups.append((kind, [value]))
+        return groups
+
+    def commit(self, soft: bool = False) -> None:
+        """
+        Flush buffered operations and commit.
+
+        Args:
+            soft: Open a new searcher without a durable hard commit
+        """
+        self.flush()
+        self.solr.commit(softCommit=soft)
+
+    def pending(self) -> int:
+        """Number of buffered operations not yet sent."""
+        with self._lock:
+            return len(self._pending)
+
+    def close(self) -> None:
+        """Flush remaining operations and stop the background flusher."""
+        self._closed.set()
+        self.flush()
+        self.transport.close()
+
+    def __enter__(self) -> 'SolrWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -0,0 +1,218 @@
+"""
+In-memory title prefix index for autocomplete.
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+from solr_client import SolrClient
+
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(text: str) -> str:
+    """
+    Fold text for prefix matching.
+
+    Case and diacritics are removed (NFKD, combining marks dropped) and
+    every run of punctuation or whitespace becomes one space, so
+    "Amélie", "amelie" and "AMELIE" match, as do "Spider-Man" and "spider man".
+    """
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(' ', stripped.casefold()).strip()
+
+
+def popularity(movie: Dict[str, Any]) -> float:
+    """
+    Ranking score: log-scaled vote count weighted by rating.
+
+    The log keeps blockbusters from burying every well-rated film, and
+    titles with few votes stay low however they are rated.
+    """
+    votes = movie.get('numVotes') or 0
+    rating = movie.get('rating') or 0.0
+    return math.log1p(votes) * (1.0 + rating)
+
+
+class TitleIndex:
+    """
+    Sorted-array prefix index over every movie title.
+
+    Each title is indexed from the start of every word ("The Dark
+    Knight" under "the dark knight", "dark knight" and "knight"), so a
+    prefix matches where Solr's title:prefix* would. Keys are kept in one
+    sorted list: a prefix is a contiguous range found with two binary
+    searches. Small ranges are ranked directly; for short, very common
+    prefixes the entries are scanned in global popularity order instead,
+    which finds the best matches after a handful of checks.
+
+    The index is built from the same JSON file index_movies.py loads
+    into Solr, and rebuilt in the background when the file or the Solr
+    index version changes.
+    """
+
+    # Ranges larger than this are answered from the popularity-ordered scan
+    SCAN_THRESHOLD = 2048
+
+    def __init__(
+        self,
+        path: str,
+        solr_client: Optional[SolrClient] = None,
+        refresh_interval: float = 30.0
+    ):
+        """
+        Args:
+            path: Movies JSON file (a list of movie documents)
+            solr_client: Client whose index version triggers rebuilds
+            refresh_interval: Seconds between change checks
+        """
+        self.path = path
+        self.solr_client = solr_client
+        self.refresh_interval = refresh_interval
+        self.version = None
+        self.mtime = None
+        self.builds = 0
+        self.build_seconds = 0.0
+        # (sorted keys, title of each key, key positions by popularity,
+        # titles, title scores), swapped in as one tuple
+        self._data: Optional[Tuple[List[str], List[int], List[int], List[Dict[str, Any]], List[float]]] = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Build the index and keep it fresh in a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background refresh."""
+        self._stopped.set()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.refresh()
+            except (OSError, ValueError) as e:
+                print(f"Title index build error: {e}")
+            if self._stopped.wait(self.refresh_interval):
+                return
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Rebuild the index if the movies file or the index version changed.
+
+        Args:
+            force: Rebuild even if nothing changed
+
+        Returns:
+            True if a new index was built
+        """
+        mtime = os.path.getmtime(self.path)
+        version = self.solr_client.index_version() if self.solr_client is not None else None
+        if self._data is not None and not force and mtime == self.mtime and version == self.version:
+            return False
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.build(json.load(f))
+        self.mtime = mtime
+        self.version = version
+        return True
+
+    def build(self, movies: List[Dict[str, Any]]) -> None:
+        """
+        Build the index from movie documents.
+
+        Args:
+            movies: Documents with at least id and title
+        """
+        started = time.perf_counter()
+
+        kept = []
+        pairs = []
+        for movie in movies:
+            title = movie.get('title')
+            if not title or not movie.get('id'):
+                continue
+            doc = {'id': movie['id'], 'title': title, 'year': movie.get('year') or ''}
+            index = len(kept)
+            kept.append((popularity(movie), doc))
+            words = normalize(title).split(' ')
+            for i in range(len(words)):
+                if words[i]:
+                    pairs.append((' '.join(words[i:]), index))
+
+        pairs.sort()
+        keys = [key for key, _ in pairs]
+        owners = [index for _, index in pairs]
+        scores = [score for score, _ in kept]
+        by_popularity = sorted(range(len(pairs)), key=lambda pos: -scores[owners[pos]])
+
+        # Swap in one assignment so readers never see a partial index
+        self._data = (keys, owners, by_popularity, [doc for _, doc in kept], scores)
+        self.builds += 1
+        self.build_seconds = time.perf_counter() - started
+
+    @property
+    def ready(self) -> bool:
+        return self._data is not None
+
+    def complete(self, prefix: str, limit: int = 10) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get the most popular titles matching a prefix.
+
+        Args:
+            prefix: Raw user input
+            limit: Maximum number of suggestions
+
+        Returns:
+            List of {id, title, year} dicts, best first, or None if the
+            index is not built yet
+        """
+        data = self._data
+        if data is None:
+            return None
+        keys, owners, by_popularity, docs, scores = data
+
+        key = normalize(prefix)
+        if not key:
+            return []
+        lo = bisect_left(keys, key)
+        hi = bisect_left(keys, key + '\uffff', lo)
+
+        if hi - lo <= self.SCAN_THRESHOLD:
+            # A title can match from more than one word; keep it once
+            candidates = {owners[pos] for pos in range(lo, hi)}
+            best = heapq.nlargest(limit, candidates, key=scores.__getitem__)
+        else:
+            best = []
+            seen = set()
+            for pos in by_popularity:
+                if lo <= pos < hi and owners[pos] not in seen:
+                    seen.add(owners[pos])
+                    best.append(owners[pos])
+                    if len(best) == limit:
+                        break
+        return [dict(docs[index]) for index in best]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get index state."""
+        data = self._data
+        return {
+            'ready': data is not None,
+            'titles': len(data[3]) if data else 0,
+            'keys': len(data[0]) if data else 0,
+            'builds': self.builds,
+            'build_ms': round(self.build_seconds * 1000, 1),
+            'index_version': self.version
+        }